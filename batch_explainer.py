@@ -0,0 +1,70 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import multiprocessing
+
+import numpy as np
+
+from forest_encoder import RandomForestEncoder
+from instance_explainer import InstanceExplainer, NotImplied
+
+
+# each worker process builds its own explainer (solvers cannot be shared across processes)
+explainer = None
+
+def init_worker(encoder: RandomForestEncoder):
+    global explainer
+    explainer = InstanceExplainer(encoder)
+
+def explain_combination(x):
+    try:
+        return explainer.explain_combination(x)
+    except NotImplied:
+        return None
+
+
+# Explanations of many instances: instances with the same leaf in every tree (signature of clf.apply) share 
+# one leaf combination, which is explained once by a maximal box containing the whole combination box
+class BatchExplainer:
+
+    def __init__(self, encoder: RandomForestEncoder, processes=4):
+        self.encoder = encoder
+        self.processes = processes
+
+    # groups of instances with identical signatures: representative row of each group and group of each row
+    def group(self, x):
+        signatures = self.encoder.rfw.clf.apply(x)
+        _, first, inverse = np.unique(signatures, axis=0, return_index=True, return_inverse=True)
+        return first, inverse.reshape(-1)
+
+    # (class_id, implicant) per row, None for rows whose combination is not implied to be of the predicted class
+    def explain(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        first, inverse = self.group(x)
+        if self.processes > 1 and len(first) > 1:
+            # fork: workers inherit the encoder without pickling
+            context = multiprocessing.get_context("fork")
+            with context.Pool(self.processes, initializer=init_worker, initargs=(self.encoder,)) as pool:
+                chunksize = max(1, len(first) // (4 * self.processes))
+                results = pool.map(explain_combination, [ x[row] for row in first ], chunksize)
+        else:
+            init_worker(self.encoder)
+            results = [ explain_combination(x[row]) for row in first ]
+        return [ results[group] for group in inverse ]
+
+    def stats(self, x):
+        first, _ = self.group(np.asarray(x, dtype=np.float32))
+        return { "instances": len(x), "combinations": len(first) }
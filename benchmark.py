@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+import argparse
+
+from gbd_tool.gbd_api import GBD
+from gbd_tool.util import eprint
+from eval import get_explainer
+from feature_cache import FeatureCache
+from model_cache import ModelCache
+from tree_wrapper import DecisionTreeWrapper
+from tree_encoder import DecisionTreeEncoder
+from forest_wrapper import RandomForestWrapper
+from forest_encoder import RandomForestEncoder
+from interval_encoding import ENCODINGS
+
+from solbert import backend
+
+
+def get_encoder(run, ex, model, encoding):
+    if run["estimator"] == "tree":
+        return DecisionTreeEncoder(DecisionTreeWrapper(model, ex.lhs, ex.rhs), encoding=encoding)
+    else:
+        return RandomForestEncoder(RandomForestWrapper(model, ex.lhs, ex.rhs), run["cores"], encoding)
+
+
+def canonical(implicants):
+    return { cat: sorted(sorted(imp) for imp in imps) for cat, imps in implicants.items() }
+
+
+# compares size and solve time of the interval encodings on the same model
+def bench_encodings(run, ex, encodings):
+    model = ex.fit(ex.x, ex.y, run["seed"])
+    reference = None
+    for encoding in encodings:
+        start = time.time()
+        encoder = get_encoder(run, ex, model, encoding)
+        t_encode = time.time() - start
+        start = time.time()
+        implicants = encoder.explain() if run["estimator"] == "tree" else encoder.explain_parallel()
+        t_solve = time.time() - start
+        stats = encoder.stats()
+        print("{encoding:>8} vars {vars:>8} clauses {clauses:>9} value vars {value_vars:>7} value clauses {value_clauses:>8}".format(**stats) 
+            + " encode {:.3f}s solve {:.3f}s".format(t_encode, t_solve))
+        # interval variables are allocated before any encoding variables, prime implicants must coincide
+        if reference is None:
+            reference = canonical(implicants)
+        elif canonical(implicants) != reference:
+            eprint("Prime implicants of {} differ from {}".format(encoding, encodings[0]))
+
+
+# prime implicant enumeration throughput of the solver backend, sequentially per class
+def bench_throughput(run, ex, encoding):
+    model = ex.fit(ex.x, ex.y, run["seed"])
+    encoder = get_encoder(run, ex, model, encoding)
+    stats = dict()
+    start = time.time()
+    implicants = encoder.explain(progress=lambda cat, report: stats.update({ cat: report }))
+    t_solve = time.time() - start
+    found = sum(len(imps) for imps in implicants.values())
+    solves = sum(report["solves"] for report in stats.values())
+    print("{} ({}): {} prime implicants {} solves in {:.3f}s, {:.1f} prime implicants/s {:.1f} solves/s".format(backend(), encoding, 
+        found, solves, t_solve, found / max(t_solve, 1e-9), solves / max(t_solve, 1e-9)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Encodings of Prime Implicant Computations')
+    parser.add_argument('-d', '--databases', nargs='+', required=True, help='GBD databases')
+    parser.add_argument('-t', '--target', choices=[ "family", "portfolio" ], default="family", help='Classification target')
+    parser.add_argument('-e', '--estimator', choices=[ "tree", "forest" ], default="tree", help='Estimator type')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('-n', '--n-estimators', type=int, default=2, help='Number of trees per forest')
+    parser.add_argument('-c', '--cores', type=int, default=4, help='Cores')
+    parser.add_argument('--encodings', nargs='+', choices=list(ENCODINGS), default=list(ENCODINGS), help='Interval encodings')
+    parser.add_argument('--throughput', action='store_true', help='Measure prime implicant throughput of the solver backend (first encoding)')
+    parser.add_argument('--cache', default="cache", help='Feature cache directory')
+    parser.add_argument('--models', default="models", help='Model cache directory')
+    args = parser.parse_args()
+
+    run = { "target": args.target, "estimator": args.estimator, "seed": args.seed, "n_estimators": args.n_estimators, "cores": args.cores }
+    with GBD(args.databases, jobs=args.cores) as api:
+        ex = get_explainer(run, api, FeatureCache(args.cache), ModelCache(args.models))
+        if args.throughput:
+            bench_throughput(run, ex, args.encodings[0])
+        else:
+            bench_encodings(run, ex, args.encodings)
+
+if __name__ == '__main__':
+    main()
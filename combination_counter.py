@@ -0,0 +1,147 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from forest_wrapper import RandomForestWrapper
+
+
+class LimitExceeded(Exception):
+
+    def __init__(self, count):
+        Exception.__init__(self, "at least {} combinations".format(count))
+        self.count = count
+
+
+# Number of valid leaf combinations (one leaf per tree, intersecting leaf boxes) without enumerating them:
+# trees are processed in order, the partial box is projected to the splits of the remaining trees 
+# and the counts of the remaining trees are memoized per projected box
+class CombinationCounter:
+
+    def __init__(self, forest: RandomForestWrapper):
+        self.rfw = forest
+        # features without intervals get one virtual interval
+        self.sizes = np.array([ max(1, len(self.rfw.feature_values(feat_id))) for feat_id in range(self.rfw.n_features()) ], dtype=np.int32)
+        self.boxes = [ self.leaf_boxes(tree_id) for tree_id in range(self.rfw.n_trees()) ]
+        # projections of lower and upper bounds to the split positions of each feature in trees tree_id, ..., n_trees-1
+        # (bound i of feature f at offsets[f] + i, positions include 0 and the size)
+        self.offsets = np.concatenate(([ 0 ], np.cumsum(self.sizes + 1)[:-1])).astype(np.int32)
+        self.lower = [ None ] * (self.rfw.n_trees() + 1)
+        self.upper = [ None ] * (self.rfw.n_trees() + 1)
+        splits = [ { 0, size } for size in self.sizes ]
+        self.lower[-1], self.upper[-1] = self.projections(splits)
+        for tree_id in reversed(range(self.rfw.n_trees())):
+            for node_id in range(self.rfw.n_nodes(tree_id)):
+                if self.rfw.is_inner_node(tree_id, node_id):
+                    feat = self.rfw.node_feature(tree_id, node_id)
+                    splits[feat].add(1+self.rfw.feature_values(feat).index(self.rfw.node_threshold(tree_id, node_id)))
+            self.lower[tree_id], self.upper[tree_id] = self.projections(splits)
+
+    def projections(self, splits):
+        lower, upper = [], []
+        for size, pos in zip(self.sizes, splits):
+            pos = np.array(sorted(pos), dtype=np.int32)
+            bounds = np.arange(size + 1)
+            lower.append(pos[np.searchsorted(pos, bounds, "right") - 1])
+            upper.append(pos[np.searchsorted(pos, bounds, "left")])
+        return np.concatenate(lower), np.concatenate(upper)
+
+    # leaf boxes in forest intervals and class probabilities of each leaf of the tree
+    def leaf_boxes(self, tree_id):
+        leafs, lo, hi, votes = [], [], [], []
+        stack = [ (0, np.zeros_like(self.sizes), self.sizes.copy()) ]
+        while len(stack) > 0:
+            node, nlo, nhi = stack.pop()
+            if self.rfw.is_inner_node(tree_id, node):
+                feat = self.rfw.node_feature(tree_id, node)
+                split = 1+self.rfw.feature_values(feat).index(self.rfw.node_threshold(tree_id, node))
+                llo, lhi, rlo, rhi = nlo.copy(), nhi.copy(), nlo.copy(), nhi.copy()
+                lhi[feat] = min(lhi[feat], split)
+                rlo[feat] = max(rlo[feat], split)
+                stack.append((self.rfw.left_child(tree_id, node), llo, lhi))
+                stack.append((self.rfw.right_child(tree_id, node), rlo, rhi))
+            else:
+                samples = self.rfw.node_samples_per_class(tree_id, node)
+                total = self.rfw.node_samples_total(tree_id, node)
+                leafs.append(node)
+                lo.append(nlo)
+                hi.append(nhi)
+                votes.append([ n / total for n in samples ])
+        return leafs, np.array(lo), np.array(hi), np.array(votes)
+
+    # widens the box to the next split positions of the remaining trees, 
+    # which keeps the box intersecting the same leaf boxes of the remaining trees
+    def project(self, tree_id, lo, hi):
+        return self.lower[tree_id][self.offsets + lo], self.upper[tree_id][self.offsets + hi]
+
+    # leafs of the tree intersecting the box and the intersections
+    def compatible(self, tree_id, lo, hi):
+        leafs, llo, lhi, votes = self.boxes[tree_id]
+        ilo, ihi = np.maximum(llo, lo), np.minimum(lhi, hi)
+        fits = np.all(ilo < ihi, axis=1)
+        return ilo[fits], ihi[fits], votes[fits]
+
+    # limit > 0: stops as soon as more than limit combinations are known to exist and returns that lower bound 
+    # (each count of completions of a partial combination is a lower bound of the total)
+    def count(self, limit=0):
+        memo = dict()
+        def count_from(tree_id, lo, hi):
+            if tree_id == self.rfw.n_trees():
+                return 1
+            lo, hi = self.project(tree_id, lo, hi)
+            key = (tree_id, lo.tobytes(), hi.tobytes())
+            if key not in memo:
+                ilo, ihi, _ = self.compatible(tree_id, lo, hi)
+                total = 0
+                for i in range(len(ilo)):
+                    total = total + count_from(tree_id + 1, ilo[i], ihi[i])
+                    if limit > 0 and total > limit:
+                        raise LimitExceeded(total)
+                memo[key] = total
+            return memo[key]
+        try:
+            return count_from(0, np.zeros_like(self.sizes), self.sizes.copy())
+        except LimitExceeded as e:
+            return e.count
+
+    # number of valid combinations per class: the leaf class probabilities are summed up tree by tree as in 
+    # RandomForestEncoder.get_class (and sklearn), such that ties are broken identically, 
+    # partial combinations with the same projected box and the same sums are merged (float sums rarely coincide, 
+    # so a layer holds up to as many states as there are valid partial combinations, each of which extends to a 
+    # valid combination); limit > 0: raises LimitExceeded with the lower bound of count() for more than limit combinations
+    def count_per_class(self, limit=0):
+        if limit > 0:
+            total = self.count(limit)
+            if total > limit:
+                raise LimitExceeded(total)
+        layer = { None: (np.zeros_like(self.sizes), self.sizes.copy(), np.zeros(self.rfw.n_classes()), 1) }
+        for tree_id in range(self.rfw.n_trees()):
+            following = dict()
+            for lo, hi, probs, n in layer.values():
+                ilo, ihi, votes = self.compatible(tree_id, lo, hi)
+                for i in range(len(ilo)):
+                    nlo, nhi = self.project(tree_id + 1, ilo[i], ihi[i])
+                    nprobs = probs + votes[i]
+                    key = (nlo.tobytes(), nhi.tobytes(), nprobs.tobytes())
+                    if key in following:
+                        following[key] = following[key][:3] + (following[key][3] + n,)
+                    else:
+                        following[key] = (nlo, nhi, nprobs, n)
+            layer = following
+        result = [ 0 ] * self.rfw.n_classes()
+        for _, _, probs, n in layer.values():
+            result[int(np.argmax(probs))] += n
+        return result
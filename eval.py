@@ -17,41 +17,142 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
 from gbd_tool.gbd_api import GBD
-from sklearn import tree, ensemble
+from gbd_tool.util import eprint
 from explain import FamilyExplainer, PortfolioExplainer
+from feature_cache import FeatureCache
+from model_cache import ModelCache
+from result_store import ResultStore
+from report import Reporter, render
+
+
+PORTFOLIO = [ "kissat_unsat", "relaxed_newtech" ]
+
+
+def get_model_getter(estimator, seed, n_estimators):
+    from sklearn import tree, ensemble
+    if estimator == "tree":
+        return lambda : tree.DecisionTreeClassifier(random_state=seed)
+    else:
+        return lambda : ensemble.RandomForestClassifier(random_state=seed, n_estimators=n_estimators)
+
 
+def get_explainer(run, api: GBD, cache: FeatureCache, models: ModelCache):
+    model_getter = get_model_getter(run["estimator"], run["seed"], run["n_estimators"])
+    if run["target"] == "family":
+        return FamilyExplainer(model_getter, api, cache, models, run["cores"])
+    else:
+        return PortfolioExplainer(model_getter, api, PORTFOLIO, cache, models, run["cores"])
 
-def explain_portfolio(model_getter, api: GBD):
-    ex = PortfolioExplainer(model_getter, api, [ "kissat_unsat", "relaxed_newtech" ])
-    ex.train_test_accuracy()
-    ex.explain()
 
+def run_name(run):
+    return "{target}_{estimator}_seed{seed}_trees{n_estimators}".format(**run)
 
-def explain_family(model_getter, api: GBD):
-    ex = FamilyExplainer(model_getter, api)
-    ex.train_test_accuracy()
-    ex.explain()
+
+def run_experiment(run, databases, cache_dir, models_dir, folds, reports_dir=None, checkpoints_dir=None, max_combinations=0):
+    row = dict(run)
+    checkpoint = os.path.join(checkpoints_dir, run_name(run)) if checkpoints_dir is not None else None
+    try:
+        with GBD(databases, jobs=run["cores"]) as api:
+            start = time.time()
+            ex = get_explainer(run, api, FeatureCache(cache_dir), ModelCache(models_dir))
+            row["t_data"] = time.time() - start
+            start = time.time()
+            if folds > 1:
+                scores = ex.cross_validate(folds, run["seed"])
+                row["accuracy"], row["accuracy_std"] = scores.mean(), scores.std()
+            else:
+                row["accuracy"] = ex.train_test_accuracy(run["seed"])
+            row["t_eval"] = time.time() - start
+            start = time.time()
+            explainer = ex.explain(run["seed"], report=False, checkpoint=checkpoint, max_combinations=max_combinations)
+            row["t_explain"] = time.time() - start
+            if explainer is None:
+                row["status"] = "skipped"
+                row["message"] = "more than {} valid combinations".format(max_combinations)
+                return row
+            # figures are rendered by the scheduler while further runs explain
+            if reports_dir is not None:
+                reporter = Reporter(os.path.join(reports_dir, run_name(run)), processes=0)
+                explainer.report(reporter)
+                row["figures"] = reporter.figures
+            sizes = [ size for cat in explainer.cats for size in explainer.pi_sizes[cat] ]
+            row["n_classes"] = len(explainer.cats)
+            row["n_prime"] = len(sizes)
+            row["mean_pi_size"] = sum(sizes) / len(sizes) if len(sizes) > 0 else 0
+            row["max_pi_size"] = max(sizes, default=0)
+            row["status"] = "done"
+    except Exception as e:
+        row["status"] = "failed"
+        row["message"] = "{}: {}".format(e.__class__.__name__, e)
+    return row
+
+
+def experiment_grid(args):
+    for target in args.targets:
+        for estimator in args.estimators:
+            for seed in args.seeds:
+                for n_estimators in (args.n_estimators if estimator == "forest" else [ 1 ]):
+                    cores = 1 if estimator == "tree" else min(args.cores, args.jobs)
+                    yield { "target": target, "estimator": estimator, "seed": seed, "n_estimators": n_estimators, "cores": cores }
+
+
+# runs are started in grid order as long as their cores fit into the global budget,
+# the figures of finished runs are rendered by a single long-lived process meanwhile
+def schedule(runs, args, store: ResultStore):
+    pending = deque(runs)
+    running = dict()
+    used = 0
+    figures = dict() # render future -> run
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool, ProcessPoolExecutor(max_workers=1) as renderer:
+        while len(pending) > 0 or len(running) > 0:
+            while len(pending) > 0 and used + pending[0]["cores"] <= args.jobs:
+                run = pending.popleft()
+                future = pool.submit(run_experiment, run, args.databases, args.cache, args.models, args.folds, args.reports, args.checkpoints, args.max_combinations)
+                running[future] = run
+                used = used + run["cores"]
+            done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+            for future in done:
+                run = running.pop(future)
+                used = used - run["cores"]
+                row = future.result()
+                for figure in row.pop("figures", []):
+                    figures[renderer.submit(render, *figure)] = run
+                eprint("Finished {}: {}".format(run, row["status"]))
+                store.insert(row)
+        for future in figures:
+            if future.exception() is not None:
+                eprint("Rendering a figure of {} failed: {}".format(figures[future], future.exception()))
 
 
 def main():
-    databases = [
-        "/home/iser/git/gbd-data/meta.db",
-        "/home/iser/git/gbd-data/base.db",
-        "/home/iser/git/gbd-data/gate.db",
-        "/home/iser/git/gbd-data/sc2020.db"
-    ]
-
-    with GBD(databases, jobs=8) as api:
-        seed = 0
-        get_decision_tree = lambda : tree.DecisionTreeClassifier(random_state=seed)
-        get_random_forest2 = lambda : ensemble.RandomForestClassifier(random_state=seed, n_estimators=2)
-        get_random_forest3 = lambda : ensemble.RandomForestClassifier(random_state=seed, n_estimators=3)
-        #explain_portfolio(get_decision_tree, api)
-        #explain_portfolio(get_random_forest2, api)
-        #explain_portfolio(get_random_forest3, api)
-        explain_family(get_decision_tree, api)
-        explain_family(get_random_forest2, api)
+    parser = argparse.ArgumentParser(description='Explain Models over a Grid of Experiments')
+    parser.add_argument('-d', '--databases', nargs='+', required=True, help='GBD databases')
+    parser.add_argument('-t', '--targets', nargs='+', choices=[ "family", "portfolio" ], default=[ "family" ], help='Classification targets')
+    parser.add_argument('-e', '--estimators', nargs='+', choices=[ "tree", "forest" ], default=[ "tree", "forest" ], help='Estimator types')
+    parser.add_argument('-s', '--seeds', type=int, nargs='+', default=[ 0 ], help='Random seeds')
+    parser.add_argument('-n', '--n-estimators', type=int, nargs='+', default=[ 2 ], help='Numbers of trees per forest')
+    parser.add_argument('-f', '--folds', type=int, default=5, help='Number of cross-validation folds (train-test split if less than two)')
+    parser.add_argument('-j', '--jobs', type=int, default=8, help='Global budget of cores')
+    parser.add_argument('-c', '--cores', type=int, default=4, help='Cores per forest run')
+    parser.add_argument('-o', '--results', default="results.db", help='Results database (sqlite)')
+    parser.add_argument('--cache', default="cache", help='Feature cache directory')
+    parser.add_argument('--models', default="models", help='Model cache directory')
+    parser.add_argument('--reports', default=None, help='Render figures and query listings to this directory')
+    parser.add_argument('--checkpoints', default=None, help='Resume prime implicant enumerations from checkpoints in this directory')
+    parser.add_argument('--max-combinations', type=int, default=0, help='Skip forests with more valid leaf combinations (0: unlimited)')
+    args = parser.parse_args()
+
+    with ResultStore(args.results) as store:
+        runs = [ run for run in experiment_grid(args) if not store.contains(run) ]
+        eprint("Scheduling {} runs".format(len(runs)))
+        schedule(runs, args, store)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -19,9 +19,6 @@
 
 import numpy as np
 import pandas as pd
-from sklearn import tree, ensemble
-from sklearn.metrics import accuracy_score
-from sklearn.model_selection import train_test_split
 
 from gbd_tool.gbd_api import GBD
 from gbd_tool.util import eprint
@@ -31,67 +28,140 @@ from tree_explainer import DecisionTreeExplainer
 
 from forest_wrapper import RandomForestWrapper
 from forest_explainer import RandomForestExplainer
+from forest_encoder import RandomForestEncoder
+from batch_explainer import BatchExplainer
+from combination_counter import CombinationCounter, LimitExceeded
+
+from feature_cache import FeatureCache
+from model_cache import ModelCache
+from report import Reporter
 
 
 class Explainer:
 
-    def __init__(self, model_getter, api: GBD, df: pd.DataFrame, target, query):
+    def __init__(self, model_getter, api: GBD, data_getter, target, query, features, cache: FeatureCache = None, models: ModelCache = None, jobs=1):
         self.get_model = model_getter
         self.api = api
         self.target = target
         self.query = query
-        self.lhs = df #self.df.drop(self.df[self.df.hash.isin(exclude_hashes)].index)
-        self.lhs.drop(["hash"], axis=1, inplace=True)
-        self.rhs = self.lhs.pop(self.target).astype("category")
-        self.x = np.nan_to_num(self.lhs.to_numpy().astype(np.float32), nan=-1)
-        self.y = self.rhs.cat.codes.to_numpy()
+        self.models = models if models is not None else ModelCache()
+        self.jobs = jobs
+        if cache is None:
+            self.lhs, self.rhs, self.x, self.y = self.prepare(data_getter())
+        else:
+            key = cache.key(query, features, target)
+            if not cache.contains(key):
+                cache.store(key, *self.prepare(data_getter()))
+            self.lhs, self.rhs, self.x, self.y = cache.load(key)
+
+    def prepare(self, df: pd.DataFrame):
+        lhs = df.drop(["hash"], axis=1)
+        rhs = lhs.pop(self.target).astype("category")
+        x = np.nan_to_num(lhs.to_numpy().astype(np.float32), nan=-1)
+        y = rhs.cat.codes.to_numpy()
+        return lhs, rhs, x, y
+
+
+    def new_model(self):
+        model = self.get_model()
+        if "n_jobs" in model.get_params():
+            model.set_params(n_jobs=self.jobs)
+        return model
+
+    def fit(self, x, y, seed=0):
+        return self.models.fit(self.new_model(), x, y, seed)
 
 
     def train_test_accuracy(self, seed=0):
+        from sklearn.metrics import accuracy_score
+        from sklearn.model_selection import train_test_split
         eprint("Testing ...")
         xtrain, xtest, ytrain, ytest = train_test_split(self.x, self.y, test_size=0.2, random_state=seed)
-        model = self.get_model()
-        model.fit(xtrain, ytrain)
+        model = self.fit(xtrain, ytrain, seed)
         ypred=model.predict(xtest)
         acc = accuracy_score(ytest, ypred)
         print("Accuracy: {}".format(acc))
+        return acc
 
-    def explain(self):
-        eprint("Training ...")
+    def cross_validate(self, folds=5, seed=0):
+        from sklearn.model_selection import StratifiedKFold, cross_val_score
+        eprint("Cross-Validating ...")
+        cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
         model = self.get_model()
-        model.fit(self.x, self.y)
+        scores = cross_val_score(model, self.x, self.y, cv=cv, scoring="accuracy", n_jobs=self.jobs)
+        print("Accuracy: {} (+/- {})".format(scores.mean(), scores.std()))
+        return scores
+
+    # engine: "sat" or "boxes" for single trees (see DecisionTreeEncoder.explain), cross_check: verify "boxes" with the SAT path
+    # collapse: collapse single-class subtrees before encoding (opt-in, changes the prime implicants of the SAT path)
+    # max_combinations > 0: skip forests with more valid leaf combinations (counted without enumerating them)
+    # budget > 0: approximate explanations of forests from samples of x within budget seconds
+    def explain(self, seed=0, report=True, reporter: Reporter = None, k=0, max_size=0, checkpoint=None, engine="sat", collapse=False, encoding=None, max_combinations=0, budget=0, cross_check=False):
+        from sklearn import tree, ensemble
+        eprint("Training ...")
+        model = self.fit(self.x, self.y, seed)
         if isinstance(model, tree.DecisionTreeClassifier):
-            wrapper = DecisionTreeWrapper(model, self.lhs, self.rhs)
-            explainer = DecisionTreeExplainer(self.query, self.api, wrapper)
-            explainer.report()
+            wrapper = DecisionTreeWrapper(model, self.lhs, self.rhs, "class" if collapse else None)
+            explainer = DecisionTreeExplainer(self.query, self.api, wrapper, k, max_size, checkpoint, engine, encoding or "direct", cross_check)
         elif isinstance(model, ensemble.RandomForestClassifier):
-            wrapper = RandomForestWrapper(model, self.lhs, self.rhs)
-            explainer = RandomForestExplainer(self.query, self.api, wrapper)
-            explainer.report()
+            wrapper = RandomForestWrapper(model, self.lhs, self.rhs, "distribution" if collapse else None)
+            if max_combinations > 0:
+                try:
+                    counts = CombinationCounter(wrapper).count_per_class(max_combinations)
+                except LimitExceeded:
+                    eprint("Skipping forest with more than {} valid combinations".format(max_combinations))
+                    return None
+                eprint("Valid combinations per class: {}".format(dict(zip(wrapper.class_names, counts))))
+            explainer = RandomForestExplainer(self.query, self.api, wrapper, self.jobs, k, max_size, checkpoint, encoding or "ladder", None, budget, self.x)
         else:
             eprint("Cannot explain models of type {}".format(type(model)))
+            return None
+        if report:
+            explainer.report(reporter)
+        return explainer
+
+    # explanation (class_id, implicant) of every row of x, computed once per leaf combination
+    def explain_instances(self, seed=0, collapse=False, encoding="ladder"):
+        from sklearn import ensemble
+        eprint("Training ...")
+        model = self.fit(self.x, self.y, seed)
+        if not isinstance(model, ensemble.RandomForestClassifier):
+            eprint("Cannot explain instances of models of type {}".format(type(model)))
+            return None
+        wrapper = RandomForestWrapper(model, self.lhs, self.rhs, "distribution" if collapse else None)
+        explainer = BatchExplainer(RandomForestEncoder(wrapper, 1, encoding), self.jobs)
+        eprint("Explaining {instances} instances in {combinations} leaf combinations ...".format(**explainer.stats(self.x)))
+        return explainer.explain(self.x)
+
+
+REPLACE = [ ("timeout", np.inf), ("memout", np.inf), ("empty", np.nan), ("failed", np.inf) ]
 
 
 class FamilyExplainer(Explainer):
 
-    def __init__(self, model_getter, api: GBD):
+    def __init__(self, model_getter, api: GBD, cache: FeatureCache = None, models: ModelCache = None, jobs=1):
         query = "track like %20% and family != unknown and family != agile and family unlike %random%"
         source = api.get_features("base_db") # + api.get_features("gate_db")
-        df = api.query_search2(query, [], source + [ "family" ], replace=[ ("timeout", np.inf), ("memout", np.inf), ("empty", np.nan), ("failed", np.inf) ])
-        Explainer.__init__(self, model_getter, api, df, "family", query)
+        features = source + [ "family" ]
+        data_getter = lambda : api.query_search2(query, [], features, replace=REPLACE)
+        Explainer.__init__(self, model_getter, api, data_getter, "family", query, features, cache, models, jobs)
 
 
 class PortfolioExplainer(Explainer):
 
-    def __init__(self, model_getter, api: GBD, solvers):
+    def __init__(self, model_getter, api: GBD, solvers, cache: FeatureCache = None, models: ModelCache = None, jobs=1):
         notout = " or ".join([ "({s} != timeout and {s} != memout)".format(s=solver) for solver in solvers ])
         query = "track = main_2020 and ({})".format(notout)
         source = api.get_features("base_db") # + api.get_features("gate_db")
-        df = api.query_search2(query, [], source + solvers, replace=[ ("timeout", np.inf), ("memout", np.inf), ("empty", np.nan), ("failed", np.inf) ])
+        features = source + solvers
+        data_getter = lambda : self.best_solver(api.query_search2(query, [], features, replace=REPLACE), solvers)
+        Explainer.__init__(self, model_getter, api, data_getter, "solver", query, features, cache, models, jobs)
+
+    def best_solver(self, df: pd.DataFrame, solvers):
         df["solver"] = "empty"
         for s in solvers:
             for idx, row in df.iterrows():
                 if float(row[s]) == min(row[solvers].astype(float)):
                     row["solver"] = s
         df.drop(solvers, axis=1, inplace=True)
-        Explainer.__init__(self, model_getter, api, df, "solver", query)
+        return df
@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+
+from gbd_tool.util import eprint
+from feature_cache import FeatureCache
+from forest_wrapper import RandomForestWrapper
+from forest_encoder import RandomForestEncoder
+from instance_explainer import InstanceExplainer
+from pi_index import ImplicantIndex
+
+
+# JSON lines over TCP, one request per line: { "id": ..., "features": { name: value } } or { "id": ..., "values": [ ... ] },
+# responses give the bounds of each constrained feature as list of ranges [ lower, upper ] (lower < value <= upper),
+# each response carries the id of its request, responses of pipelined requests may arrive out of order
+# index: precomputed prime implicants, instances matching one of them are answered without a solver
+class ExplanationServer:
+
+    def __init__(self, encoder: RandomForestEncoder, workers=4, index: ImplicantIndex = None):
+        self.encoder = encoder
+        self.index = index
+        self.features = [ encoder.rfw.feature_name(feat_id) for feat_id in range(encoder.rfw.n_features()) ]
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        # each explainer (with its warm solvers) is used by one request at a time
+        self.explainers = asyncio.Queue()
+        for _ in range(workers):
+            self.explainers.put_nowait(InstanceExplainer(encoder))
+
+    def instance(self, request):
+        if "values" in request:
+            x = [ float(v) if v is not None else -1 for v in request["values"] ]
+            if len(x) != len(self.features):
+                raise ValueError("expected {} values".format(len(self.features)))
+        else:
+            values = request["features"]
+            x = [ float(values[feat]) if values.get(feat) is not None else -1 for feat in self.features ]
+        return np.array(x)
+
+    def lookup(self, request):
+        if self.index is None:
+            return None
+        start = time.time()
+        pi = self.index.lookup(self.instance(request))[0]
+        if pi < 0:
+            return None
+        bounds = self.index.bounds(pi)
+        return { "id": request.get("id"), "class": self.index.class_name(pi), "query": self.index.query(pi), 
+            "features": len(bounds), "bounds": self.json_bounds(bounds), "ms": 1000 * (time.time() - start) }
+
+    # feature -> list of [ lower, upper ] ranges (None: unbounded)
+    def json_bounds(self, bounds):
+        return { feat: [ [ float(lo) if np.isfinite(lo) else None, float(hi) if np.isfinite(hi) else None ] for lo, hi in ranges ] for feat, ranges in bounds.items() }
+
+    def respond(self, explainer: InstanceExplainer, request):
+        start = time.time()
+        class_id, implicant = explainer.explain(self.instance(request))
+        explanation = self.encoder.decode(implicant)
+        return { "id": request.get("id"), "class": str(self.encoder.rfw.class_name(class_id)), "query": explanation["query"], 
+            "features": explanation["features"], "bounds": self.json_bounds(self.encoder.bounds(implicant)), "ms": 1000 * (time.time() - start) }
+
+    async def explain(self, line, writer, lock):
+        request = dict()
+        try:
+            request = json.loads(line)
+            response = self.lookup(request)
+            if response is None:
+                explainer = await self.explainers.get()
+                try:
+                    response = await asyncio.get_running_loop().run_in_executor(self.executor, self.respond, explainer, request)
+                finally:
+                    self.explainers.put_nowait(explainer)
+        except Exception as e:
+            response = { "id": request.get("id") if isinstance(request, dict) else None, "error": "{}: {}".format(e.__class__.__name__, e) }
+        async with lock:
+            writer.write((json.dumps(response) + "\n").encode("utf-8"))
+            await writer.drain()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        lock = asyncio.Lock()
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                task = asyncio.create_task(self.explain(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if len(tasks) > 0:
+            await asyncio.wait(tasks)
+        writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        eprint("Serving explanations on {}:{}".format(host, port))
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve Explanations of Single Predictions of a Random Forest')
+    parser.add_argument('-m', '--model', required=True, help='Fitted forest (joblib file of the model cache)')
+    parser.add_argument('-c', '--cache', default="cache", help='Feature cache directory')
+    parser.add_argument('-k', '--key', required=True, help='Feature cache key of the training data')
+    parser.add_argument('-w', '--workers', type=int, default=4, help='Concurrent explanations')
+    parser.add_argument('-i', '--index', help='Prime implicant index (npz file, see ImplicantIndex.save) to answer matching instances from')
+    parser.add_argument('--collapse', action='store_true', help='Collapse subtrees with identical class distributions')
+    parser.add_argument('--host', default="127.0.0.1", help='Host')
+    parser.add_argument('--port', type=int, default=8765, help='Port')
+    args = parser.parse_args()
+
+    lhs, rhs, _, _ = FeatureCache(args.cache).load(args.key)
+    wrapper = RandomForestWrapper(joblib.load(args.model), lhs, rhs, "distribution" if args.collapse else None)
+    encoder = RandomForestEncoder(wrapper, 1)
+    index = ImplicantIndex.load(args.index) if args.index is not None else None
+    server = ExplanationServer(encoder, args.workers, index)
+    asyncio.run(server.serve(args.host, args.port))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+
+# Processed feature matrices persisted as .npy files and memory-mapped read-only,
+# such that all explainers and pool workers share the same pages
+class FeatureCache:
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        os.makedirs(self.path, exist_ok=True)
+
+    def key(self, query, features, target):
+        digest = hashlib.sha1()
+        digest.update(query.encode("utf-8"))
+        digest.update(b"\0" + target.encode("utf-8"))
+        for feat in features:
+            digest.update(b"\0" + feat.encode("utf-8"))
+        return digest.hexdigest()
+
+    def file(self, key, name):
+        return os.path.join(self.path, "{}.{}".format(key, name))
+
+    def contains(self, key):
+        return os.path.isfile(self.file(key, "json"))
+
+    def store(self, key, lhs: pd.DataFrame, rhs: pd.Series, x: np.ndarray, y: np.ndarray):
+        self.save(self.file(key, "x.npy"), x)
+        self.save(self.file(key, "y.npy"), y)
+        meta = { "features": list(lhs), "target": rhs.name, "categories": list(rhs.cat.categories) }
+        tmp = self.file(key, "json.{}".format(os.getpid()))
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        # meta data is written last, it marks the entry as complete:
+        os.replace(tmp, self.file(key, "json"))
+
+    def load(self, key):
+        with open(self.file(key, "json")) as f:
+            meta = json.load(f)
+        x = np.load(self.file(key, "x.npy"), mmap_mode="r")
+        y = np.load(self.file(key, "y.npy"), mmap_mode="r")
+        lhs = pd.DataFrame(x, columns=meta["features"], copy=False)
+        rhs = pd.Series(pd.Categorical.from_codes(y, meta["categories"]), name=meta["target"])
+        return lhs, rhs, x, y
+
+    def save(self, path, array):
+        tmp = "{}.{}.npy".format(path, os.getpid())
+        np.save(tmp, np.ascontiguousarray(array))
+        os.replace(tmp, path)
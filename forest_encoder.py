@@ -15,20 +15,25 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import numpy as np
-import multiprocessing
+from functools import partial
 
 from forest_wrapper import RandomForestWrapper
-from tree_encoder import VariableProducer
+from tree_encoder import VariableProducer, checkpoint_file, interval_ranges, decode_bounds
+from interval_encoding import ENCODINGS
+from worker_pool import WorkerPool
 
 from solbert import compute_prime_implicants
+from solbert import compute_shortest_prime_implicants
 from solbert import enumerate_models
 from solbert import model_iterator
 
 class RandomForestEncoder:
 
-    def __init__(self, forest: RandomForestWrapper):
+    def __init__(self, forest: RandomForestWrapper, processes=4, encoding="ladder"):
         self.rfw = forest
+        self.processes = processes
         self.vprod = VariableProducer()
+        self.encoding = encoding
         # node variables:
         self.vnodestrue = []
         self.vnodesfalse = []
@@ -42,13 +47,6 @@ class RandomForestEncoder:
         self.vintervall = []
         for feat_id in range(self.rfw.n_features()):
             self.vintervall.extend(self.vintervals[feat_id])
-        # deactivation variables:
-        self.vdeactivateleft = []
-        for feat_id in range(self.rfw.n_features()):
-            self.vdeactivateleft.append([ self.new_var() for _ in self.rfw.feature_values(feat_id) ])
-        self.vdeactivateright = []
-        for feat_id in range(self.rfw.n_features()):
-            self.vdeactivateright.append([ self.new_var() for _ in self.rfw.feature_values(feat_id) ])
         # base encoding
         self.clauses = self.encode()
         total_comb = 1
@@ -59,10 +57,6 @@ class RandomForestEncoder:
         self.comb = [ [ ] for _ in range(self.rfw.n_classes()) ] 
         self.enumerate_valid_combinations()
         print("Valid Combinations: {}".format(sum(len(valid_combs) for valid_combs in self.comb)))
-        self.pool = multiprocessing.Pool(processes=4)
-
-    def __del__(self):
-        self.pool.terminate()
 
 
     def new_var(self):
@@ -93,65 +87,87 @@ class RandomForestEncoder:
         assert False, "variable {} not found".format(var_id)
 
 
-    def explain(self):
+    # k > 0 or max_size > 0: enumerate only the k shortest prime implicants up to max_size
+    # checkpoint: directory for resumable per-class enumerations
+    # progress: called with the class and a dict of found, solves and seconds (see solbert), cancel: token such as threading.Event, 
+    # a cancelled enumeration returns the prime implicants found so far, remaining classes are skipped
+    def explain(self, k=0, max_size=0, checkpoint=None, progress=None, cancel=None):
         implicants = dict()
         for cat in range(self.rfw.n_classes()):
+            if cancel is not None and cancel.is_set():
+                break
             target = self.encode_target_class(cat)
-            implicants[cat] = compute_prime_implicants(self.clauses + target, self.vintervall)
-            implicants[cat].sort(key=len)
+            report = partial(progress, cat) if progress is not None else None
+            if k > 0 or max_size > 0:
+                implicants[cat] = compute_shortest_prime_implicants(self.clauses + target, self.vintervall, 0, 0, k, max_size, progress=report, cancel=cancel)
+            else:
+                path = checkpoint_file(checkpoint, cat)
+                implicants[cat] = compute_prime_implicants(self.clauses + target, self.vintervall, 0, 0, path, progress=report, cancel=cancel)
+                implicants[cat].sort(key=len)
         return implicants
 
 
-    def explain_parallel(self):
-        results = list()
-        for class_id in range(self.rfw.n_classes()):
-            target = self.encode_target_class(class_id)
-            res = self.pool.apply_async(compute_prime_implicants, (self.clauses + target, self.vintervall))
-            results.append(res)
-        implicants = dict()
-        for class_id in range(self.rfw.n_classes()):
-            cat = self.rfw.class_name(class_id)
-            implicants[cat] = results[class_id].get()
-            implicants[cat].sort(key=len)
+    # pool: WorkerPool to run in (reusable across encoders), a temporary pool of the given number of processes otherwise
+    # progress, cancel: as in explain (called with the class name), forwarded from and to the workers through the manager of the pool,
+    # a cancelled enumeration returns the prime implicants found so far, no prime implicants for classes not started
+    def explain_parallel(self, k=0, max_size=0, checkpoint=None, pool: WorkerPool = None, progress=None, cancel=None):
+        if pool is None:
+            with WorkerPool(self.processes) as pool:
+                return self.explain_parallel(k, max_size, checkpoint, pool, progress, cancel)
+        shared = pool.share(self.clauses)
+        queue = pool.queue() if progress is not None else None
+        token = pool.event() if cancel is not None else None
+        try:
+            results = list()
+            for class_id in range(self.rfw.n_classes()):
+                if cancel is not None and cancel.is_set():
+                    break
+                target = self.encode_target_class(class_id)
+                cat = self.rfw.class_name(class_id)
+                if k > 0 or max_size > 0:
+                    res = pool.shortest_prime_implicants(shared, target, self.vintervall, k, max_size, queue, cat, token)
+                else:
+                    res = pool.prime_implicants(shared, target, self.vintervall, checkpoint_file(checkpoint, class_id), queue, cat, token)
+                results.append(res)
+            results = pool.wait(results, queue, progress, token, cancel)
+            implicants = dict()
+            for class_id in range(self.rfw.n_classes()):
+                cat = self.rfw.class_name(class_id)
+                implicants[cat] = results[class_id] if class_id < len(results) else []
+                implicants[cat].sort(key=len)
+        finally:
+            pool.release(shared)
         return implicants
 
 
     def encode_target_class(self, class_id):
+        return self.encode_target_classes([ class_id ])
+
+    # some valid combination of one of the classes
+    def encode_target_classes(self, class_ids):
         root_clause = []
         term_clauses = []
-        for term in self.comb[class_id]:
-            enc = self.new_var()
-            root_clause.append(enc)
-            for lit in term:
-                term_clauses.append([ -enc, lit ])
+        for class_id in class_ids:
+            for term in self.comb[class_id]:
+                enc = self.new_var()
+                root_clause.append(enc)
+                for lit in term:
+                    term_clauses.append([ -enc, lit ])
         return term_clauses + [ root_clause ]
 
 
     def decode(self, implicant):
-        query = []
-        nfeats = 0
-        ncases = 0
+        return decode_bounds(self.bounds(implicant))
+
+
+    # value ranges [ (lower, upper], ... ] of the features constrained by the implicant
+    def bounds(self, implicant):
+        disabled = set(implicant)
+        result = dict()
         for feat_id in range(self.rfw.n_features()):
-            feat = self.rfw.feature_name(feat_id)
-            prev = ncases
-            for i in range(len(self.vintervals[feat_id])-1):
-                m0 = -self.vintervals[feat_id][i] in implicant
-                m1 = -self.vintervals[feat_id][i+1] in implicant
-                if m0 != m1:
-                    ncases = ncases + 1
-                    thre = self.rfw.feature_value(feat_id, i)
-                    form = "{:7f}".format(thre).rstrip('0').rstrip('.')
-                    query.append("{} {} {}".format(feat, ">" if m0 else "<=", form))
-            if prev != ncases:
-                nfeats = nfeats + 1
-        result = { "features": nfeats, "cases": ncases }
-        if len(query) > 10:
-            split = int(len(query)/2)
-            query1 = " and ".join(query[:split])
-            query2 = " and ".join(query[split:])
-            result["query"] = "(" + query1 + ") and (" + query2 + ")"
-        else:
-            result["query"] = " and ".join(query)
+            enabled = [ i for i, v in enumerate(self.vintervals[feat_id]) if -v not in disabled ]
+            if 0 < len(enabled) < len(self.vintervals[feat_id]):
+                result[self.rfw.feature_name(feat_id)] = interval_ranges(self.rfw.feature_values(feat_id), enabled)
         return result
 
 
@@ -178,27 +194,22 @@ class RandomForestEncoder:
 
     # node disables values
     def encode_value_constraints(self):
-        clauses = []
-        # encode value constraints
+        self.encodings = [ ENCODINGS[self.encoding](self.new_var, vintervals) for vintervals in self.vintervals ]
         for tree_id in range(self.rfw.n_trees()):
             for node_id in range(self.rfw.n_nodes(tree_id)):
                 if self.rfw.is_inner_node(tree_id, node_id): 
                     feat = self.rfw.node_feature(tree_id, node_id)
                     thre = self.rfw.node_threshold(tree_id, node_id)
                     split = 1+self.rfw.feature_values(feat).index(thre)
-                    clauses.append([ -self.node2var(tree_id, node_id, False), self.vdeactivateleft[feat][split-1] ])
-                    if split < len(self.vdeactivateright[feat]):
-                        clauses.append([ -self.node2var(tree_id, node_id, True), self.vdeactivateright[feat][split] ])
-        # encode deactivation constraints
-        for feat_id in range(self.rfw.n_features()):
-            for i in range(1, len(self.vintervals[feat_id])):
-                clauses.append([ self.vdeactivateleft[feat_id][i-1], -self.vdeactivateleft[feat_id][i] ])
-                clauses.append([ -self.vdeactivateright[feat_id][i-1], self.vdeactivateright[feat_id][i] ])
-        for feat_id in range(self.rfw.n_features()):
-            for i in range(len(self.vintervals[feat_id])):
-                clauses.append([ -self.vdeactivateleft[feat_id][i], self.vintervals[feat_id][i] ])
-                clauses.append([ -self.vdeactivateright[feat_id][i], self.vintervals[feat_id][i] ])
-        return clauses
+                    # false disables left values, true disables right values:
+                    self.encodings[feat].disable_below(self.node2var(tree_id, node_id, False), split)
+                    self.encodings[feat].disable_above(self.node2var(tree_id, node_id, True), split)
+        return [ clause for encoding in self.encodings for clause in encoding.clauses ]
+
+
+    def stats(self):
+        return { "encoding": self.encoding, "vars": self.vprod.vars, "clauses": len(self.clauses), 
+            "value_vars": sum(enc.nvars for enc in self.encodings), "value_clauses": sum(len(enc.clauses) for enc in self.encodings) }
 
 
     def get_class(self, comb):
@@ -226,9 +237,15 @@ class RandomForestEncoder:
     def enumerate_valid_combinations(self):
         clauses = self.clauses + self.encode_combination_constraints()
         project = self.get_leaf_vars()
-        for comb in model_iterator(clauses, project):
-            class_id = self.get_class(comb)
-            self.comb[class_id].append(comb)
+        models = model_iterator(clauses, project)
+        while True:
+            batch = np.frombuffer(models.next_batch(4096), dtype=np.int32).reshape(-1, len(project))
+            if len(batch) == 0:
+                break
+            for row in batch:
+                comb = row[row != 0].tolist()
+                class_id = self.get_class(comb)
+                self.comb[class_id].append(comb)
 
 
     def encode_combination_constraints(self):
@@ -243,7 +260,8 @@ class RandomForestEncoder:
         # at least one value per feature:
         for feat_id in range(self.rfw.n_features()):
             clause = [ -v for v in self.vintervals[feat_id] ]
-            clauses.append(clause)
+            if len(clause) > 0:
+                clauses.append(clause)
         return clauses
 
 
@@ -24,20 +24,38 @@ from gbd_tool.util import eprint
 
 from forest_encoder import RandomForestEncoder
 from forest_wrapper import RandomForestWrapper
+from worker_pool import WorkerPool
+from sampling_explainer import SamplingExplainer
 
-from matplotlib import pyplot as plt
+from pi_index import ImplicantIndex
+from report import Reporter
 
 
 class RandomForestExplainer:
 
-    def __init__(self, query, api: GBD, wrapper: RandomForestWrapper):
+    def __init__(self, query, api: GBD, wrapper: RandomForestWrapper, processes=4, k=0, max_size=0, checkpoint=None, encoding="ladder", pool: WorkerPool = None, budget=0, x=None):
         self.query = query
         self.api = api
         self.wrapper = wrapper
-        self.encoder = RandomForestEncoder(wrapper)
+        setup = time.time()
+        self.encoder = RandomForestEncoder(wrapper, processes, encoding)
         self.cats = self.wrapper.class_names
         start = time.time()
-        self.implicants = self.encoder.explain_parallel()
+        if budget > 0:
+            # approximate: prime implicants of instances of x (random instances if None) found within budget seconds;
+            # the setup (enumeration of the valid combinations by the encoder, one solver per class over the combinations 
+            # of the other classes) counts against the budget but cannot be interrupted, approximation only helps 
+            # if enumerating the valid combinations is feasible (see max_combinations of Explainer.explain)
+            sampler = SamplingExplainer(self.encoder, x)
+            remaining = budget - (time.time() - setup)
+            if remaining > 0:
+                self.implicants = sampler.explain(remaining)
+                eprint("Coverage: {}".format(sampler.coverage))
+            else:
+                eprint("Budget of {} seconds exhausted by the setup".format(budget))
+                self.implicants = { cat: [] for cat in self.cats }
+        else:
+            self.implicants = self.encoder.explain_parallel(k, max_size, checkpoint, pool)
         end = time.time()
         eprint("Seconds to explain: {}".format(round(end - start)))
         self.nprime = dict() # category -> n prime implicants
@@ -57,30 +75,22 @@ class RandomForestExplainer:
             self.pi_sizes[cat].sort()
 
 
-    def report(self):
-        self.report_pi_sizes()
-        self.report_numbers_of_samples()
+    # lookup index of the prime implicants for new instances (see ImplicantIndex.save)
+    def index(self):
+        return ImplicantIndex.build(self.encoder, self.implicants)
 
-    def report_pi_sizes(self):
-        fig, ax = plt.subplots()
-        ax.set_xlabel("Prime Implicant")
-        ax.set_ylabel("Numbers of Case Distinctions")
-        plt.title("Sizes of Prime Implicants")
-        for cat in self.cats:
-            plt.plot(self.pi_sizes[cat], label=cat)
-        plt.legend(loc="upper left")
-        plt.show()
+    def report(self, reporter: Reporter = None):
+        reporter = reporter if reporter is not None else Reporter()
+        self.report_pi_sizes(reporter)
+        self.report_numbers_of_samples(reporter)
 
-    def report_numbers_of_samples(self):
-        fig, ax = plt.subplots()
-        ax.set_xlabel("Prime Implicant")
-        ax.set_ylabel("Numbers of Samples")
-        ax.set_xscale('log')
-        plt.title("Number of Samples per Prime Implicant")
-        for cat in self.cats:
-            plt.plot(self.nsamples[cat], label=cat)
-        plt.legend(loc="upper left")
-        plt.show()
+    def report_pi_sizes(self, reporter: Reporter):
+        series = [ (cat, self.pi_sizes[cat]) for cat in self.cats ]
+        reporter.plot("pi_sizes", "Sizes of Prime Implicants", "Prime Implicant", "Numbers of Case Distinctions", series)
+
+    def report_numbers_of_samples(self, reporter: Reporter):
+        series = [ (cat, self.nsamples[cat]) for cat in self.cats ]
+        reporter.plot("numbers_of_samples", "Number of Samples per Prime Implicant", "Prime Implicant", "Numbers of Samples", series, xscale="log")
 
 
     def plot(self, leaf_data, imp_data):
@@ -16,24 +16,26 @@
 
 import numpy as np
 import pandas as pd
-from sklearn import ensemble
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from sklearn import ensemble
 from tree_wrapper import DecisionTreeWrapper
 
 class RandomForestWrapper:
 
-    def __init__(self, clf: ensemble.RandomForestClassifier, lhs: pd.DataFrame, rhs: pd.Categorical):
+    # collapse: see DecisionTreeWrapper, only "distribution" preserves the soft votes of the forest
+    def __init__(self, clf: "ensemble.RandomForestClassifier", lhs: pd.DataFrame, rhs: pd.Categorical, collapse=None):
         self.clf = clf
         self.feature_names = list(lhs)
         self.class_names = list(rhs.cat.categories)
-        self.trees = [ DecisionTreeWrapper(tree, lhs, rhs) for tree in self.clf.estimators_ ]
-        # calc values:
-        self.feature_splits = [ [ np.infty, ] for _ in range(self.n_features()) ]
+        self.trees = [ DecisionTreeWrapper(tree, lhs, rhs, collapse) for tree in self.clf.estimators_ ]
+        # calc values (features without splits in any tree get no intervals):
+        self.feature_splits = [ set() for _ in range(self.n_features()) ]
         for tree in self.trees:
             for feat, splits in enumerate(tree.feature_splits):
-                self.feature_splits[feat].extend(splits)
-        for values in self.feature_splits:
-            values = sorted(set(values))
-            #print(len(values))
+                self.feature_splits[feat].update(splits)
+        self.feature_splits = [ sorted(values) for values in self.feature_splits ]
 
     def leaf_nodes(self, class_name):
         nodes = []
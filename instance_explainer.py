@@ -0,0 +1,153 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from bisect import bisect_left
+
+import numpy as np
+
+from forest_encoder import RandomForestEncoder
+
+from solbert import solver
+
+
+# the box around the instance is not implied to be of the predicted class (e.g. the votes tie differently)
+class NotImplied(Exception):
+
+    def __init__(self, class_name):
+        Exception.__init__(self, "instance is not implied to be of class {}".format(class_name))
+        self.class_name = class_name
+
+
+# Abductive explanation of single predictions: a prime implicant (subset-minimal set of disabled intervals) 
+# containing the instance such that no valid combination of another class intersects it. Each class has a warm 
+# solver over base encoding, combination constraints and the other classes as target; sets of disabled intervals 
+# are checked by assumptions (unsatisfiable: the enabled intervals imply the class). A maximal box around the 
+# instance is computed first and then minimized over single intervals, which matters if the class region is not 
+# convex along a feature (the box disables intervals beyond a gap in which the class also holds).
+class InstanceExplainer:
+
+    def __init__(self, encoder: RandomForestEncoder):
+        self.encoder = encoder
+        self.rfw = encoder.rfw
+        base = encoder.clauses + encoder.encode_combination_constraints()
+        self.solvers = [ solver(base + encoder.encode_target_classes(self.others(class_id))) for class_id in range(self.rfw.n_classes()) ]
+
+    def others(self, class_id):
+        return [ other for other in range(self.rfw.n_classes()) if other != class_id ]
+
+    def predict(self, x):
+        return int(self.rfw.clf.predict(np.asarray(x, dtype=np.float32).reshape(1, -1))[0])
+
+    # interval of each feature the value falls into (x <= threshold goes left, compared in float32 like sklearn)
+    def intervals(self, x):
+        x = np.asarray(x, dtype=np.float32).astype(np.float64)
+        return [ bisect_left(self.rfw.feature_values(feat_id), x[feat_id]) for feat_id in range(self.rfw.n_features()) ]
+
+    def assumptions(self, lo, hi):
+        return [ v for feat_id, vars in enumerate(self.encoder.vintervals) for i, v in enumerate(vars) if not lo[feat_id] <= i < hi[feat_id] ]
+
+    # the class is implied under the assumptions only if the solver proves it (unknown results count as not implied),
+    # failed() must only be called after such a proof
+    @staticmethod
+    def implied(sat, assumptions):
+        return sat.solve(assumptions) is False
+
+    # features without disabled intervals in the final conflict can be released altogether
+    def release(self, sat, assumptions, lo, hi):
+        core = set(sat.failed(assumptions))
+        for feat_id, vars in enumerate(self.encoder.vintervals):
+            if not any(v in core for v in vars):
+                lo[feat_id], hi[feat_id] = 0, len(vars)
+
+    # box of the leaf combination the intervals fall into (intersection of the leaf boxes)
+    def combination_box(self, intervals):
+        lo = [ 0 ] * self.rfw.n_features()
+        hi = [ len(vars) for vars in self.encoder.vintervals ]
+        for tree in self.rfw.trees:
+            node = 0
+            while tree.is_inner_node(node):
+                feat = tree.node_feature(node)
+                split = 1+self.rfw.feature_values(feat).index(tree.node_threshold(node))
+                if intervals[feat] < split:
+                    hi[feat] = min(hi[feat], split)
+                    node = tree.left_child(node)
+                else:
+                    lo[feat] = max(lo[feat], split)
+                    node = tree.right_child(node)
+        return lo, hi
+
+    def explain(self, x):
+        class_id = self.predict(x)
+        lo = self.intervals(x)
+        hi = [ i + 1 if len(vars) > 0 else 0 for i, vars in zip(lo, self.encoder.vintervals) ]
+        lo = [ min(i, len(vars)) for i, vars in zip(lo, self.encoder.vintervals) ]
+        return class_id, self.minimize(class_id, self.maximize(class_id, lo, hi))
+
+    # explanation shared by all instances in the leaf combination of x
+    def explain_combination(self, x):
+        class_id = self.predict(x)
+        lo, hi = self.combination_box(self.intervals(x))
+        return class_id, self.minimize(class_id, self.maximize(class_id, lo, hi))
+
+    # extends the box [lo, hi) to a maximal box implying the class
+    def maximize(self, class_id, lo, hi):
+        sat = self.solvers[class_id]
+        assumptions = self.assumptions(lo, hi)
+        if not self.implied(sat, assumptions):
+            raise NotImplied(self.rfw.class_name(class_id))
+        self.release(sat, assumptions, lo, hi)
+        # drop features
+        for feat_id, vars in enumerate(self.encoder.vintervals):
+            if (lo[feat_id], hi[feat_id]) != (0, len(vars)):
+                plo, phi = lo[feat_id], hi[feat_id]
+                lo[feat_id], hi[feat_id] = 0, len(vars)
+                assumptions = self.assumptions(lo, hi)
+                if self.implied(sat, assumptions):
+                    self.release(sat, assumptions, lo, hi)
+                else:
+                    lo[feat_id], hi[feat_id] = plo, phi
+        # extend the remaining features to the left and to the right
+        for feat_id, vars in enumerate(self.encoder.vintervals):
+            left, right = 0, lo[feat_id]
+            while left < right:
+                lo[feat_id] = (left + right) // 2
+                if self.implied(sat, self.assumptions(lo, hi)):
+                    right = lo[feat_id]
+                else:
+                    left = lo[feat_id] + 1
+            lo[feat_id] = right
+            left, right = hi[feat_id], len(vars)
+            while left < right:
+                hi[feat_id] = (left + right + 1) // 2
+                if self.implied(sat, self.assumptions(lo, hi)):
+                    left = hi[feat_id]
+                else:
+                    right = hi[feat_id] - 1
+            hi[feat_id] = left
+        return [ -v for v in self.assumptions(lo, hi) ]
+
+    # enables disabled intervals one at a time as long as the class is implied (final conflicts drop further intervals),
+    # each remaining interval failed on a superset of the result, so the result is a prime implicant
+    def minimize(self, class_id, implicant):
+        sat = self.solvers[class_id]
+        disabled = [ -lit for lit in implicant ]
+        for var in list(disabled):
+            if var in disabled:
+                trial = [ v for v in disabled if v != var ]
+                if self.implied(sat, trial):
+                    core = set(sat.failed(trial))
+                    disabled = [ v for v in trial if v in core ]
+        return [ -v for v in disabled ]
@@ -0,0 +1,112 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Encodings of "lit disables the intervals [begin, end) of a feature" (interval variables true = disabled).
+# Interval variables only occur positively, auxiliary variables are created on demand and 
+# only imply interval variables, such that the formula stays monotonic in the intervals.
+
+class DirectEncoding:
+
+    def __init__(self, new_var, intervals):
+        self.new_var = new_var
+        self.intervals = intervals
+        self.clauses = []
+        self.nvars = 0
+
+    def var(self):
+        self.nvars = self.nvars + 1
+        return self.new_var()
+
+    def disable_below(self, lit, split):
+        self.disable(lit, 0, split)
+
+    def disable_above(self, lit, split):
+        self.disable(lit, split, len(self.intervals))
+
+    # one binary clause per disabled interval
+    def disable(self, lit, begin, end):
+        for v in self.intervals[begin:end]:
+            self.clauses.append([ -lit, v ])
+
+
+# order encoding: prefix variable j disables intervals [0, j], suffix variable j disables [j, n),
+# such that each split costs one clause
+class LadderEncoding(DirectEncoding):
+
+    def __init__(self, new_var, intervals):
+        DirectEncoding.__init__(self, new_var, intervals)
+        self.prefix = dict()
+        self.suffix = dict()
+
+    # creates the missing steps from pos towards the end of the ladder
+    def ladder(self, steps, pos, step):
+        created = []
+        i = pos
+        while 0 <= i < len(self.intervals) and i not in steps:
+            steps[i] = self.var()
+            self.clauses.append([ -steps[i], self.intervals[i] ])
+            created.append(i)
+            i = i + step
+        for i in created:
+            if i + step in steps:
+                self.clauses.append([ -steps[i], steps[i + step] ])
+        return steps[pos]
+
+    def disable(self, lit, begin, end):
+        if begin >= end:
+            return
+        elif begin == 0:
+            self.clauses.append([ -lit, self.ladder(self.prefix, end - 1, -1) ])
+        elif end == len(self.intervals):
+            self.clauses.append([ -lit, self.ladder(self.suffix, begin, 1) ])
+        else:
+            DirectEncoding.disable(self, lit, begin, end)
+
+
+# log-style encoding: segment tree over the intervals, each inner segment variable disables both halves,
+# such that each split costs O(log n) clauses
+class SegmentEncoding(DirectEncoding):
+
+    def __init__(self, new_var, intervals):
+        DirectEncoding.__init__(self, new_var, intervals)
+        self.segments = dict()
+
+    def segment(self, a, b):
+        if b - a == 1:
+            return self.intervals[a]
+        if (a, b) not in self.segments:
+            mid = (a + b) // 2
+            var = self.var()
+            self.segments[(a, b)] = var
+            self.clauses.append([ -var, self.segment(a, mid) ])
+            self.clauses.append([ -var, self.segment(mid, b) ])
+        return self.segments[(a, b)]
+
+    def disable(self, lit, begin, end):
+        stack = [ (0, len(self.intervals)) ]
+        while len(stack) > 0:
+            a, b = stack.pop()
+            if end <= a or b <= begin:
+                continue
+            elif begin <= a and b <= end:
+                self.clauses.append([ -lit, self.segment(a, b) ])
+            else:
+                mid = (a + b) // 2
+                stack.extend(((a, mid), (mid, b)))
+
+
+ENCODINGS = { "direct": DirectEncoding, "ladder": LadderEncoding, "segment": SegmentEncoding }
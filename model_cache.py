@@ -0,0 +1,65 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import hashlib
+
+import joblib
+import numpy as np
+
+
+# Fitted estimators keyed by a hash of the training data, the estimator parameters and the seed,
+# kept in memory and optionally persisted with joblib
+class ModelCache:
+
+    # parameters which do not influence the fitted model
+    IGNORE = [ "n_jobs", "verbose" ]
+
+    def __init__(self, path=None):
+        self.path = os.path.abspath(path) if path is not None else None
+        self.models = dict()
+        if self.path is not None:
+            os.makedirs(self.path, exist_ok=True)
+
+    def key(self, model, x: np.ndarray, y: np.ndarray, seed=0):
+        params = { k: v for k, v in model.get_params().items() if k not in ModelCache.IGNORE }
+        digest = hashlib.sha1()
+        digest.update(type(model).__name__.encode("utf-8"))
+        digest.update(repr(sorted(params.items())).encode("utf-8"))
+        digest.update(str(seed).encode("utf-8"))
+        for array in (x, y):
+            array = np.ascontiguousarray(array)
+            digest.update("{}{}".format(array.dtype, array.shape).encode("utf-8"))
+            digest.update(array.data)
+        return digest.hexdigest()
+
+    def file(self, key):
+        return os.path.join(self.path, "{}.joblib".format(key))
+
+    def fit(self, model, x: np.ndarray, y: np.ndarray, seed=0):
+        key = self.key(model, x, y, seed)
+        if key in self.models:
+            return self.models[key]
+        if self.path is not None and os.path.isfile(self.file(key)):
+            model = joblib.load(self.file(key))
+        else:
+            model.fit(x, y)
+            if self.path is not None:
+                tmp = "{}.{}".format(self.file(key), os.getpid())
+                joblib.dump(model, tmp)
+                os.replace(tmp, self.file(key))
+        self.models[key] = model
+        return model
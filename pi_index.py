@@ -0,0 +1,152 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from tree_encoder import DecisionTreeEncoder, interval_ranges, decode_bounds
+
+
+# Lookup of the prime implicants (of all classes) matching new instances, without model or solver:
+# per feature the sorted split values (the interval of a value is found by binary search) and, for features
+# constrained by some prime implicant, a bitset per interval of the prime implicants enabling it. The matches
+# of a row are the intersection of the bitsets of its intervals. Prime implicants are ordered by size, 
+# such that the first match of an instance is a shortest one.
+class ImplicantIndex:
+
+    def __init__(self, features, classes, splits, pi_class, queries, masked, masks):
+        self.features = list(features)
+        self.classes = list(classes)
+        self.splits = splits # feature -> split values (upper bounds of the intervals)
+        self.pi_class = pi_class # prime implicant -> class id
+        self.queries = queries # prime implicant -> query
+        self.masked = masked # features constrained by some prime implicant
+        self.masks = masks # masked feature -> intervals x packed bits of the prime implicants
+
+    # implicants: class name (or id) -> prime implicants over the interval variables of the encoder
+    @staticmethod
+    def build(encoder, implicants):
+        wrapper = encoder.dtw if isinstance(encoder, DecisionTreeEncoder) else encoder.rfw
+        classes = [ wrapper.class_name(class_id) for class_id in range(wrapper.n_classes()) ]
+        entries = []
+        for class_id, cat in enumerate(classes):
+            for imp in implicants[cat] if cat in implicants else implicants.get(class_id, []):
+                entries.append((class_id, imp))
+        entries.sort(key=lambda entry: len(entry[1]))
+        position = { v: (feat_id, i) for feat_id, vars in enumerate(encoder.vintervals) for i, v in enumerate(vars) }
+        enabled = dict() # masked feature -> intervals x prime implicants
+        for pi, (_, imp) in enumerate(entries):
+            for lit in imp:
+                feat_id, i = position[-lit]
+                if feat_id not in enabled:
+                    enabled[feat_id] = np.ones((len(encoder.vintervals[feat_id]), len(entries)), dtype=bool)
+                enabled[feat_id][i, pi] = False
+        masked = np.array(sorted(enabled), dtype=np.int64)
+        masks = [ np.packbits(enabled[feat_id], axis=1) for feat_id in masked ]
+        features = [ wrapper.feature_name(feat_id) for feat_id in range(wrapper.n_features()) ]
+        splits = [ np.array(wrapper.feature_values(feat_id), dtype=np.float64) for feat_id in range(wrapper.n_features()) ]
+        pi_class = np.array([ class_id for class_id, _ in entries ], dtype=np.int32)
+        index = ImplicantIndex(features, [ str(cat) for cat in classes ], splits, pi_class, np.zeros(0, dtype=str), masked, masks)
+        # queries describe the same ranges as bounds()
+        index.queries = np.array([ decode_bounds(index.bounds(pi))["query"] for pi in range(len(entries)) ], dtype=str)
+        return index
+
+
+    def save(self, path):
+        np.savez(path, features=np.array(self.features, dtype=str), classes=np.array(self.classes, dtype=str),
+            pi_class=self.pi_class, queries=self.queries, masked=self.masked,
+            splits=np.concatenate([ np.zeros(0) ] + self.splits), split_offsets=offsets(self.splits),
+            masks=np.concatenate([ np.zeros(0, dtype=np.uint8) ] + [ mask.reshape(-1) for mask in self.masks ]))
+
+    @staticmethod
+    def load(path):
+        with np.load(path, allow_pickle=False) as data:
+            splits = np.split(data["splits"], data["split_offsets"][1:-1])
+            width = (len(data["pi_class"]) + 7) // 8
+            sizes = [ len(splits[feat_id]) * width for feat_id in data["masked"] ]
+            masks = [ mask.reshape(-1, width) for mask in np.split(data["masks"], np.cumsum(sizes)[:-1]) ] if len(sizes) > 0 else []
+            return ImplicantIndex(data["features"].tolist(), data["classes"].tolist(), splits, data["pi_class"], data["queries"], data["masked"], masks)
+
+
+    def n_implicants(self):
+        return len(self.pi_class)
+
+    # interval of each value (x <= split value, compared in float32 like sklearn), rows x features
+    def intervals(self, x):
+        x = np.asarray(x, dtype=np.float32).astype(np.float64).reshape(-1, len(self.features))
+        result = np.zeros(x.shape, dtype=np.int64)
+        for feat_id, values in enumerate(self.splits):
+            if len(values) > 0:
+                result[:, feat_id] = np.minimum(np.searchsorted(values, x[:, feat_id], side="left"), len(values) - 1)
+        return result
+
+    # (first row, rows x packed bits of the matching prime implicants) for chunks of at most about size bytes
+    def matches(self, x, size=1 << 24):
+        intervals = self.intervals(x)
+        width = (self.n_implicants() + 7) // 8
+        step = max(1, size // max(1, width))
+        for start in range(0, len(intervals), step):
+            rows = intervals[start:start+step]
+            match = np.full((len(rows), width), 255, dtype=np.uint8)
+            for feat_id, mask in zip(self.masked, self.masks):
+                match &= mask[rows[:, feat_id]]
+            yield start, match
+
+    # shortest matching prime implicant of each row, -1 if none matches
+    def lookup(self, x):
+        result = np.full(len(np.reshape(x, (-1, len(self.features)))), -1, dtype=np.int64)
+        if self.n_implicants() == 0:
+            return result
+        for start, match in self.matches(x):
+            nonzero = match != 0
+            byte = nonzero.argmax(axis=1)
+            bit = np.unpackbits(match[np.arange(len(match)), byte][:, np.newaxis], axis=1).argmax(axis=1)
+            result[start:start+len(match)] = np.where(nonzero.any(axis=1), 8 * byte + bit, -1)
+        return result
+
+    # class id of the shortest matching prime implicant of each row, -1 if none matches
+    def predict(self, x):
+        pis = self.lookup(x)
+        return np.where(pis >= 0, self.pi_class[np.maximum(pis, 0)], -1)
+
+    # all matches as parallel arrays of rows and prime implicants
+    def lookup_all(self, x):
+        rows = [ np.zeros(0, dtype=np.int64) ]
+        pis = [ np.zeros(0, dtype=np.int64) ]
+        for start, match in self.matches(x):
+            r, p = np.nonzero(np.unpackbits(match, axis=1, count=self.n_implicants()))
+            rows.append(start + r)
+            pis.append(p)
+        return np.concatenate(rows), np.concatenate(pis)
+
+
+    def class_name(self, pi):
+        return self.classes[self.pi_class[pi]]
+
+    def query(self, pi):
+        return str(self.queries[pi])
+
+    # value ranges [ (lower, upper], ... ] of the features constrained by the prime implicant
+    def bounds(self, pi):
+        result = dict()
+        for feat_id, mask in zip(self.masked, self.masks):
+            enabled = np.flatnonzero((mask[:, pi // 8] >> (7 - pi % 8)) & 1)
+            if 0 < len(enabled) < len(self.splits[feat_id]):
+                result[self.features[feat_id]] = [ (float(lower), float(upper)) for lower, upper in interval_ranges(self.splits[feat_id], enabled) ]
+        return result
+
+
+def offsets(arrays):
+    return np.cumsum([ 0 ] + [ len(array) for array in arrays ])
@@ -0,0 +1,92 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+
+# draws a figure, saves it to path with a non-interactive backend or shows it if path is None
+def render(path, title, xlabel, ylabel, series, xscale=None, legend="upper left"):
+    import matplotlib
+    if path is not None:
+        matplotlib.use("Agg")
+    from matplotlib import pyplot as plt
+    fig, ax = plt.subplots()
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    if xscale is not None:
+        ax.set_xscale(xscale)
+    plt.title(title)
+    for label, values in series:
+        plt.plot(values, label=label)
+    plt.legend(loc=legend)
+    if path is not None:
+        fig.savefig(path)
+        plt.close(fig)
+    else:
+        plt.show()
+
+
+# Interactive (outdir is None) or headless reporting;
+# headless figures are rendered in background processes (in parallel with more than one process)
+# while the caller continues until close(), which waits for all figures;
+# with no processes headless figures are only collected (as arguments of render) for a renderer shared by several reporters
+class Reporter:
+
+    def __init__(self, outdir=None, processes=1):
+        self.outdir = outdir
+        self.pool = None
+        self.futures = []
+        self.figures = []
+        if self.outdir is not None:
+            os.makedirs(self.outdir, exist_ok=True)
+            if processes > 0:
+                self.pool = ProcessPoolExecutor(max_workers=processes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            for future in self.futures:
+                future.result()
+            self.pool.shutdown()
+            self.pool = None
+            self.futures = []
+
+    def path(self, name, ext):
+        name = re.sub(r"[^\w\-.]", "_", name)
+        return os.path.join(self.outdir, "{}.{}".format(name, ext))
+
+    def plot(self, name, title, xlabel, ylabel, series, xscale=None, legend="upper left"):
+        if self.outdir is None:
+            render(None, title, xlabel, ylabel, series, xscale, legend)
+        elif self.pool is None:
+            self.figures.append((self.path(name, "pdf"), title, xlabel, ylabel, series, xscale, legend))
+        else:
+            future = self.pool.submit(render, self.path(name, "pdf"), title, xlabel, ylabel, series, xscale, legend)
+            self.futures.append(future)
+
+    def text(self, name, lines):
+        if self.outdir is None:
+            print("\n".join(lines))
+        else:
+            with open(self.path(name, "txt"), "w") as f:
+                f.write("\n".join(lines) + "\n")
@@ -0,0 +1,54 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import sqlite3
+
+
+# Append-only sqlite table of experiment results, written by the scheduling process as runs finish
+class ResultStore:
+
+    COLUMNS = [ ("target", "TEXT"), ("estimator", "TEXT"), ("seed", "INTEGER"), ("n_estimators", "INTEGER"),
+        ("status", "TEXT"), ("accuracy", "REAL"), ("accuracy_std", "REAL"), ("n_classes", "INTEGER"),
+        ("n_prime", "INTEGER"), ("mean_pi_size", "REAL"), ("max_pi_size", "INTEGER"),
+        ("t_data", "REAL"), ("t_eval", "REAL"), ("t_explain", "REAL"), ("message", "TEXT") ]
+
+    def __init__(self, path, table="runs"):
+        self.table = table
+        self.con = sqlite3.connect(path)
+        cols = ", ".join("{} {}".format(name, kind) for name, kind in ResultStore.COLUMNS)
+        self.con.execute("CREATE TABLE IF NOT EXISTS {} ({})".format(self.table, cols))
+        self.con.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.con.close()
+
+    def contains(self, run):
+        keys = [ "target", "estimator", "seed", "n_estimators" ]
+        where = " and ".join("{} = ?".format(k) for k in keys)
+        cur = self.con.execute("SELECT 1 FROM {} WHERE status = 'done' and {}".format(self.table, where), [ run[k] for k in keys ])
+        return cur.fetchone() is not None
+
+    def insert(self, row):
+        names = [ name for name, _ in ResultStore.COLUMNS ]
+        marks = ", ".join("?" for _ in names)
+        self.con.execute("INSERT INTO {} ({}) VALUES ({})".format(self.table, ", ".join(names), marks), [ row.get(name) for name in names ])
+        self.con.commit()
@@ -0,0 +1,113 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+
+import numpy as np
+
+from forest_encoder import RandomForestEncoder
+from instance_explainer import InstanceExplainer, NotImplied
+
+
+# Approximate explanations within a time budget: instances (rows of x or random points) are sampled per class 
+# round robin, each instance not yet covered by an implicant of its class is explained by the prime implicant 
+# of its leaf combination (see InstanceExplainer, subset-minimal by construction of the deletion pass).
+# Coverage of each class is the fraction of its sampled instances covered by the implicants found.
+class SamplingExplainer:
+
+    def __init__(self, encoder: RandomForestEncoder, x=None, seed=0):
+        self.encoder = encoder
+        self.rfw = encoder.rfw
+        self.instances = InstanceExplainer(encoder)
+        self.rng = np.random.RandomState(seed)
+        self.x = np.asarray(x, dtype=np.float32) if x is not None else None
+        # interval i of feature f at offsets[f] + i, features without intervals get one virtual interval
+        self.sizes = np.array([ max(1, len(vars)) for vars in encoder.vintervals ])
+        self.offsets = np.concatenate(([ 0 ], np.cumsum(self.sizes)[:-1]))
+
+    # points inside random intervals of each feature
+    def random_instances(self, n):
+        x = np.zeros((n, self.rfw.n_features()), dtype=np.float32)
+        for feat_id in range(self.rfw.n_features()):
+            splits = self.rfw.feature_values(feat_id)
+            if len(splits) > 0:
+                # upper bounds of the intervals, the last (unbounded) interval starts after the last threshold
+                bounds = np.array(splits[:-1] + [ splits[-2] + 1 if len(splits) > 1 else 0 ], dtype=np.float64)
+                values = bounds.astype(np.float32)
+                # thresholds rounded up to float32 would fall into the next interval
+                values = np.where(values.astype(np.float64) > bounds, np.nextafter(values, np.float32(-np.inf)), values)
+                x[:, feat_id] = values[self.rng.randint(len(values), size=n)]
+        return x
+
+    # sampled instances of each class in random order
+    def sample(self, n=10000):
+        x = self.x if self.x is not None else self.random_instances(n)
+        x = x[self.rng.permutation(len(x))]
+        predictions = self.rfw.clf.predict(x)
+        return [ x[predictions == class_id] for class_id in range(self.rfw.n_classes()) ]
+
+    def intervals(self, x):
+        columns = [ np.searchsorted(self.rfw.feature_values(feat_id), x[:, feat_id].astype(np.float64), "left") if len(vars) > 0 else np.zeros(len(x), dtype=int)
+            for feat_id, vars in enumerate(self.encoder.vintervals) ]
+        return self.offsets + np.stack(columns, axis=1)
+
+    # rows (interval indices) covered by the implicant
+    def covers(self, implicant, intervals):
+        enabled = np.ones(self.sizes.sum(), dtype=bool)
+        disabled = set(-lit for lit in implicant)
+        for feat_id, vars in enumerate(self.encoder.vintervals):
+            for i, v in enumerate(vars):
+                if v in disabled:
+                    enabled[self.offsets[feat_id] + i] = False
+        return np.all(enabled[intervals], axis=1)
+
+    # implicants per class name, sorted by size, within budget seconds
+    def explain(self, budget=60, n=10000):
+        deadline = time.time() + budget
+        samples = self.sample(n)
+        intervals = [ self.intervals(x) for x in samples ]
+        covered = [ np.zeros(len(x), dtype=bool) for x in samples ]
+        positions = [ 0 ] * self.rfw.n_classes()
+        implicants = [ [] for _ in range(self.rfw.n_classes()) ]
+        while time.time() < deadline:
+            active = [ class_id for class_id in range(self.rfw.n_classes()) if positions[class_id] < len(samples[class_id]) ]
+            if len(active) == 0:
+                break
+            for class_id in active:
+                # next uncovered instance of the class
+                row = positions[class_id]
+                while row < len(samples[class_id]) and covered[class_id][row]:
+                    row = row + 1
+                positions[class_id] = row + 1
+                if row >= len(samples[class_id]) or time.time() >= deadline:
+                    continue
+                try:
+                    predicted, implicant = self.instances.explain_combination(samples[class_id][row])
+                except NotImplied:
+                    continue
+                if predicted == class_id and implicant not in implicants[class_id]:
+                    implicants[class_id].append(implicant)
+                    covered[class_id] |= self.covers(implicant, intervals[class_id])
+        self.coverage = dict()
+        self.support = dict()
+        result = dict()
+        for class_id in range(self.rfw.n_classes()):
+            cat = self.rfw.class_name(class_id)
+            implicants[class_id].sort(key=len)
+            result[cat] = implicants[class_id]
+            self.support[cat] = [ int(self.covers(imp, intervals[class_id]).sum()) for imp in implicants[class_id] ]
+            self.coverage[cat] = float(covered[class_id].mean()) if len(covered[class_id]) > 0 else 1.0
+        return result
@@ -20,10 +20,14 @@ OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWA
 from distutils.core import setup, Extension
 import os
 
+# native CaDiCaL backend (phases, frozen variables, constraints), set SOLBERT_IPASIR to use the IPASIR interface only
+macros = [ ] if os.environ.get("SOLBERT_IPASIR") else [ ("SOLBERT_CADICAL", None) ]
+
 module = Extension("solbert",
         libraries = ["archive", "cadical"],
         library_dirs=[os.path.abspath("./build/cadical/src/Cadical/build")],
-        include_dirs=["."],
+        include_dirs=[".", os.path.abspath("./build/cadical/src/Cadical/src")],
+        define_macros=macros,
         sources = ["src/solbert.cc"])
 
 setup(name="solbert", version="1.0", author="Markus Iser", description="Accelerator Module for Explainer", ext_modules=[module])
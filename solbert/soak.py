@@ -0,0 +1,117 @@
+"""
+Solbert -- Copyright (c) 2022, Markus Iser, KIT - Karlsruhe Institute of Technology
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and
+associated documentation files (the "Software"), to deal in the Software without restriction,
+including without limitation the rights to use, copy, modify, merge, publish, distribute,
+sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT
+NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT
+OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Soak test for the solbert extension: repeatedly drives every entry point on
+# small synthetic formulas and fails if resident or traced memory keeps growing
+
+import os
+import sys
+import gzip
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+import solbert
+
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+# monotone formula over n inputs, disabling any clause's inputs falsifies the output
+def synthetic(rng, n, m, width):
+    inputs = list(range(1, n + 1))
+    formula = [ sorted(rng.sample(inputs, width)) for _ in range(m) ]
+    return formula, inputs
+
+
+def exercise(rng, path, args):
+    formula, inputs = synthetic(rng, args.vars, args.clauses, args.width)
+    pis = solbert.compute_prime_implicants(formula, inputs)
+    assert isinstance(pis, list)
+    solbert.compute_prime_implicants2(formula, inputs)
+    solbert.compute_prime_implicants2(formula, inputs, 0, 0, None, 1)
+    models = solbert.enumerate_models(formula, inputs)
+    assert isinstance(models, list)
+    mit = solbert.model_iterator(formula, inputs)
+    for _ in mit:
+        pass
+    mit = solbert.model_iterator(formula, inputs)
+    while len(mit.next_batch(8)):
+        pass
+    store = solbert.clause_store(path)
+    assert len(store) == len(store.offsets()) // 8 - 1
+    solbert.compute_prime_implicants2(store, inputs, 0, 0, list(range(0, len(store), 2)))
+    try:
+        solbert.compute_prime_implicants2(store, inputs, 0, 0, [ len(store) ])
+    except IndexError:
+        pass
+    for bad in ([ [ 1, "x" ] ], [ [ 2 ** 40 ] ], 7):
+        try:
+            solbert.compute_prime_implicants(bad, inputs)
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("accepted malformed formula {}".format(bad))
+
+
+def write_store(rng, path, args):
+    formula, _ = synthetic(rng, args.vars, args.clauses, args.width)
+    with gzip.open(path, "wt") as f:
+        f.write("p cnf {} {}\n".format(args.vars, len(formula)))
+        for clause in formula:
+            f.write(" ".join(str(lit) for lit in clause) + " 0\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect memory leaks in the solbert extension")
+    parser.add_argument("-i", "--iterations", type=int, default=2000)
+    parser.add_argument("-w", "--warmup", type=int, default=200)
+    parser.add_argument("-v", "--vars", type=int, default=12)
+    parser.add_argument("-c", "--clauses", type=int, default=6)
+    parser.add_argument("-k", "--width", type=int, default=3)
+    parser.add_argument("-r", "--max-rss", type=float, default=4.0, help="Tolerated RSS growth in MiB")
+    parser.add_argument("-p", "--max-traced", type=float, default=0.5, help="Tolerated traced growth in MiB")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "soak.cnf.gz")
+        write_store(rng, path, args)
+        for _ in range(args.warmup):
+            exercise(rng, path, args)
+        tracemalloc.start()
+        rss0, traced0 = rss(), tracemalloc.get_traced_memory()[0]
+        for i in range(args.iterations):
+            exercise(rng, path, args)
+        rss1, traced1 = rss(), tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+    drss = (rss1 - rss0) / 2 ** 20
+    dtraced = (traced1 - traced0) / 2 ** 20
+    print("iterations: {}, rss growth: {:.2f} MiB, traced growth: {:.2f} MiB".format(args.iterations, drss, dtraced))
+    if drss > args.max_rss or dtraced > args.max_traced:
+        print("memory growth exceeds threshold")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+/*************************************************************************************************
+Solbert -- Copyright (c) 2022, Markus Iser, KIT - Karlsruhe Institute of Technology
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and
+associated documentation files (the "Software"), to deal in the Software without restriction,
+including without limitation the rights to use, copy, modify, merge, publish, distribute,
+sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT
+NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT
+OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ **************************************************************************************************/
+
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+#include "src/util/PyUtil.h"
+#include "src/util/ClauseStore.h"
+
+#ifndef SRC_APPS_CLAUSESTOREOBJECT_H_
+#define SRC_APPS_CLAUSESTOREOBJECT_H_
+
+typedef struct ClauseStoreObject {
+    PyObject_HEAD
+    ClauseStore* store;
+} ClauseStoreObject;
+
+static PyObject* clause_store_new(PyTypeObject *type, PyObject *args, PyObject *kwargs) {
+    const char* filename;
+    if (!PyArg_ParseTuple(args, "s", &filename)) {
+        return nullptr;
+    }
+
+    ClauseStore* store = new ClauseStore();
+    std::string error;
+    Py_BEGIN_ALLOW_THREADS
+    try {
+        store->read_dimacs(filename);
+    } catch (ParserException& e) {
+        error = e.what();
+    } catch (std::bad_alloc& e) {
+        error = "out of memory";
+    }
+    Py_END_ALLOW_THREADS
+    if (!error.empty()) {
+        delete store;
+        PyErr_SetString(PyExc_IOError, error.c_str());
+        return nullptr;
+    }
+
+    ClauseStoreObject* obj = (ClauseStoreObject*) type->tp_alloc(type, 0);
+    if (obj == nullptr) {
+        delete store;
+        return nullptr;
+    }
+    obj->store = store;
+    return (PyObject*) obj;
+}
+
+static void clause_store_delete(ClauseStoreObject* obj) {
+    delete obj->store;
+    Py_TYPE(obj)->tp_free((PyObject*) obj);
+}
+
+static Py_ssize_t clause_store_len(PyObject* self) {
+    return static_cast<Py_ssize_t>(((ClauseStoreObject*) self)->store->size());
+}
+
+static PyObject* clause_store_item(PyObject* self, Py_ssize_t i) {
+    ClauseStore* store = ((ClauseStoreObject*) self)->store;
+    if (i < 0 || static_cast<size_t>(i) >= store->size()) {
+        PyErr_SetString(PyExc_IndexError, "clause index out of range");
+        return nullptr;
+    }
+    PyObject* clause = PyList_New(store->end(i) - store->begin(i));
+    if (clause == nullptr) return nullptr;
+    Py_ssize_t j = 0;
+    for (const int32_t* lit = store->begin(i); lit != store->end(i); ++lit) {
+        PyList_SET_ITEM(clause, j++, PyLong_FromLong(*lit));
+    }
+    return clause;
+}
+
+static PyObject* clause_store_nvars(PyObject* self, void* closure) {
+    return PyLong_FromUnsignedLong(((ClauseStoreObject*) self)->store->nvars);
+}
+
+// flat int32 literals (without terminating zeros), usable with numpy.frombuffer
+static PyObject* clause_store_literals(PyObject* self, PyObject* args) {
+    ClauseStore* store = ((ClauseStoreObject*) self)->store;
+    return PyBytes_FromStringAndSize((const char*) store->literals.data(), store->literals.size() * sizeof(int32_t));
+}
+
+// uint64 offsets of clauses into literals (one more than there are clauses)
+static PyObject* clause_store_offsets(PyObject* self, PyObject* args) {
+    ClauseStore* store = ((ClauseStoreObject*) self)->store;
+    return PyBytes_FromStringAndSize((const char*) store->offsets.data(), store->offsets.size() * sizeof(uint64_t));
+}
+
+static PyMethodDef clause_store_methods[] = {
+    {"literals", clause_store_literals, METH_NOARGS, "Flat int32 literal array"},
+    {"offsets", clause_store_offsets, METH_NOARGS, "Clause offsets (uint64) into literal array"},
+    {nullptr, nullptr, 0, nullptr}
+};
+
+static PyGetSetDef clause_store_getset[] = {
+    {"nvars", clause_store_nvars, nullptr, "Number of variables", nullptr},
+    {nullptr, nullptr, nullptr, nullptr, nullptr}
+};
+
+static PySequenceMethods clause_store_sequence = {
+    clause_store_len, /* sq_length */ 0, /* sq_concat */ 0, /* sq_repeat */ clause_store_item, /* sq_item */
+};
+
+static PyTypeObject ClauseStoreType = {
+    PyVarObject_HEAD_INIT(&PyType_Type, 0)
+    "solbert.ClauseStore", /*tp_name*/
+    sizeof(ClauseStoreObject), /*tp_basicsize*/
+    0, /*tp_itemsize*/
+    (destructor) clause_store_delete, /*tp_dealloc*/
+    0, /*tp_print*/ 0, /*tp_getattr*/ 0, /*tp_setattr*/ 0, /*tp_compare*/ 0, /*tp_repr*/ 0, /*tp_as_number*/
+    &clause_store_sequence, /*tp_as_sequence*/
+    0, /*tp_as_mapping*/ 0, /*tp_hash */ 0, /*tp_call*/ 0, /*tp_str*/ 0, /*tp_getattro*/ 0, /*tp_setattro*/ 0, /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT, /* tp_flags */
+    "solbert clause store: DIMACS CNF (plain or compressed) read into flat native arrays.", /* tp_doc */
+    0, /* tp_traverse */ 0, /* tp_clear */ 0, /* tp_richcompare */ 0, /* tp_weaklistoffset */
+    0, /* tp_iter */ 0, /* tp_iternext */
+    clause_store_methods, /* tp_methods */ 0, /* tp_members */ clause_store_getset, /* tp_getset */ 0, /* tp_base */ 0, /* tp_dict */
+    0, /* tp_descr_get */ 0, /* tp_descr_set */ 0, /* tp_dictoffset */ 0, /* tp_init */
+    PyType_GenericAlloc, /* tp_alloc */
+    clause_store_new, /* tp_new */
+};
+
+/**
+ * @brief Clauses of a formula given as list of clauses, clause store, flat buffer of clauses 
+ * (see buffer_to_formula) or as tuple of such parts (concatenated)
+ * 
+ * @param pyformula list of lists of literals, ClauseStore, buffer or tuple of these
+ * @param pyclauses optional list of clause ids (selects clauses from clause store)
+ * @return std::vector<std::vector<int>> 
+ */
+static std::vector<std::vector<int>> get_formula(PyObject* pyformula, PyObject* pyclauses) {
+    if (PyObject_TypeCheck(pyformula, &ClauseStoreType)) {
+        ClauseStore* store = ((ClauseStoreObject*) pyformula)->store;
+        std::vector<std::vector<int>> formula;
+        if (pyclauses != nullptr && pyclauses != Py_None) {
+            for (int id : list_to_vec(pyclauses)) {
+                if (id < 0 || static_cast<size_t>(id) >= store->size()) {
+                    throw std::out_of_range("clause id out of range");
+                }
+                formula.push_back(store->clause(id));
+            }
+        } else {
+            for (size_t i = 0; i < store->size(); ++i) {
+                formula.push_back(store->clause(i));
+            }
+        }
+        return formula;
+    }
+    if (PyTuple_Check(pyformula)) {
+        std::vector<std::vector<int>> formula;
+        for (Py_ssize_t i = 0; i < PyTuple_GET_SIZE(pyformula); i++) {
+            std::vector<std::vector<int>> part = get_formula(PyTuple_GET_ITEM(pyformula, i), nullptr);
+            formula.insert(formula.end(), part.begin(), part.end());
+        }
+        return formula;
+    }
+    if (PyObject_CheckBuffer(pyformula)) {
+        return buffer_to_formula(pyformula);
+    }
+    return list_to_formula(pyformula);
+}
+
+#endif  // SRC_APPS_CLAUSESTOREOBJECT_H_
@@ -21,45 +21,51 @@ OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWA
 
 #include <vector>
 
-#include "lib/ipasir.h"
+#include "src/util/Progress.h"
+#include "src/util/Solver.h"
 
 #ifndef SRC_APPS_ENUMERATEMODELS_H_
 #define SRC_APPS_ENUMERATEMODELS_H_
 
-std::vector<std::vector<int>> get_models(std::vector<std::vector<int>> formula, std::vector<int> projection) {
+/**
+ * @brief Get models projected to the given variables
+ * 
+ * @param formula 
+ * @param projection 
+ * @param progress report progress to and stop early on interruption (optional, partial result)
+ * @return std::vector<std::vector<int>> 
+ */
+std::vector<std::vector<int>> get_models(std::vector<std::vector<int>> formula, std::vector<int> projection, Progress* progress = nullptr) {
     // initialize solver
-    void* S = ipasir_init();
-    for (std::vector<int>& clause : formula) {
-        for (int lit : clause) {
-            ipasir_add(S, lit);
-        }
-        ipasir_add(S, 0);
+    Solver S;
+    for (int var : projection) {
+        S.freeze(var);
     }
+    S.add_formula(formula);
 
     std::vector<std::vector<int>> models;
 
-    while (ipasir_solve(S) == 10) {
+    while (progress_solve(progress, S) == 10) {
         std::vector<int> model;
 
         for (int var : projection) {
-            if (ipasir_val(S, var) >= 0) {
+            if (S.val(var) >= 0) {
                 model.push_back(var);
             }
         }
 
         for (int var : model) {
-            ipasir_add(S, -var);
+            S.add(-var);
         }
-        ipasir_add(S, 0);
+        S.add(0);
 
         // std::cout << "Found Model " << models.size() << ": ";
         // for (int lit : model) std::cout << lit << " ";
         // std::cout << std::endl;
         models.push_back(model);
+        progress_found(progress);
     }
 
-    ipasir_release(S);
-
     return models;
 }
 
@@ -21,7 +21,7 @@ OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWA
 
 #include <vector>
 
-#include "lib/ipasir.h"
+#include "src/util/Solver.h"
 
 #include "src/util/PyUtil.h"
 
@@ -30,61 +30,87 @@ OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWA
 
 typedef struct ModelIterator {
     PyObject_HEAD
-    void* solver;
-    std::vector<int> projection;
+    Solver* solver;
+    std::vector<int>* projection;
 } ModelIterator;
 
 static PyObject* model_iterator_new(PyTypeObject *type, PyObject *args, PyObject *kwargs) {
     PyObject* pyformula;
     PyObject* pyinputs;
 
-    PyArg_ParseTuple(args, "OO", &pyformula, &pyinputs);
+    if (!PyArg_ParseTuple(args, "OO", &pyformula, &pyinputs)) {
+        return nullptr;
+    }
 
-    std::vector<std::vector<int>> formula = list_to_formula(pyformula);
+    std::vector<std::vector<int>> formula;
+    std::vector<int> projection;
+    try {
+        formula = list_to_formula(pyformula);
+        projection = list_to_vec(pyinputs);
+    } catch (std::invalid_argument& e) {
+        PyErr_SetString(PyExc_TypeError, e.what());
+        return nullptr;
+    }
 
     ModelIterator* mit = (ModelIterator*) type->tp_alloc(type, 0);
+    if (mit == nullptr) {
+        return nullptr;
+    }
 
     // init sat solver
-    mit->solver = ipasir_init();
-    for (std::vector<int>& clause : formula) {
-        for (int lit : clause) {
-            ipasir_add(mit->solver, lit);
-        }
-        ipasir_add(mit->solver, 0);
+    mit->solver = new Solver();
+    for (int var : projection) {
+        mit->solver->freeze(var);
     }
+    mit->solver->add_formula(formula);
 
-    mit->projection = list_to_vec(pyinputs);
+    mit->projection = new std::vector<int>(projection);
 
     return (PyObject*) mit;
 }
 
 static void model_iterator_delete(ModelIterator* mit) {
-    ipasir_release(mit->solver);
-    // Py_TYPE(mit)->tp_free(mit);  // segfaults (TODO: study)
+    delete mit->solver;
+    delete mit->projection;
+    Py_TYPE(mit)->tp_free((PyObject*) mit);
+}
+
+/**
+ * @brief Find next model, write projection to model (var if true, 0 otherwise) and block it
+ * 
+ * @return false if there are no more models
+ */
+static bool model_iterator_step(ModelIterator* mit, int* model) {
+    if (mit->solver->solve() != 10) {
+        return false;
+    }
+    const std::vector<int>& projection = *mit->projection;
+    for (size_t i = 0; i < projection.size(); ++i) {
+        int var = projection[i];
+        model[i] = mit->solver->val(var) >= 0 ? var : 0;  // TODO: replace >= by > (and test difference)
+    }
+    for (size_t i = 0; i < projection.size(); ++i) {
+        if (model[i] != 0) mit->solver->add(-model[i]);
+    }
+    mit->solver->add(0);
+    return true;
 }
 
 static PyObject* model_iterator_next(PyObject *self) {
     ModelIterator* mit = (ModelIterator*) self;
+    std::vector<int> model(mit->projection->size());
 
-    if (ipasir_solve(mit->solver) == 10) {
-        std::vector<int> model;
-
-        for (int var : mit->projection) {
-            if (ipasir_val(mit->solver, var) >= 0) {  // TODO: replace >= by > (and test difference)
-                model.push_back(var);
-            }
+    if (model_iterator_step(mit, model.data())) {
+        Py_ssize_t n = 0;
+        for (int var : model) {
+            if (var != 0) ++n;
         }
-
-        for (int lit : model) {
-            ipasir_add(mit->solver, -lit);
-        }
-        ipasir_add(mit->solver, 0);
-
-        PyObject* pym = pylist();
-        for (int lit : model) {
-            pylist(pym, lit);
+        PyObject* pym = PyList_New(n);
+        if (pym == nullptr) return nullptr;
+        Py_ssize_t i = 0;
+        for (int var : model) {
+            if (var != 0) PyList_SET_ITEM(pym, i++, PyLong_FromLong(var));
         }
-
         return pym;
     } else {
         /* Raising of standard StopIteration exception with empty value. */
@@ -93,6 +119,36 @@ static PyObject* model_iterator_next(PyObject *self) {
     }
 }
 
+/**
+ * @brief Up to k models as bytes of int32 values, one row of len(projection) per model, 
+ * row entries are the projected variables which are true in the model and 0 otherwise,
+ * use numpy.frombuffer(batch, dtype=numpy.int32).reshape(-1, len(projection))
+ * returns empty bytes if there are no more models
+ */
+static PyObject* model_iterator_next_batch(PyObject *self, PyObject *args) {
+    ModelIterator* mit = (ModelIterator*) self;
+    unsigned k = 1024;
+    if (!PyArg_ParseTuple(args, "|I", &k)) {
+        return nullptr;
+    }
+
+    size_t width = mit->projection->size();
+    std::vector<int32_t> models(width * k);
+    size_t n = 0;
+    Py_BEGIN_ALLOW_THREADS
+    while (n < k && model_iterator_step(mit, models.data() + n * width)) {
+        ++n;
+    }
+    Py_END_ALLOW_THREADS
+
+    return PyBytes_FromStringAndSize((const char*) models.data(), n * width * sizeof(int32_t));
+}
+
+static PyMethodDef model_iterator_methods[] = {
+    {"next_batch", model_iterator_next_batch, METH_VARARGS, "Next k models as int32 bytes (one row of len(projection) per model)"},
+    {nullptr, nullptr, 0, nullptr}
+};
+
 static PyTypeObject ModelIteratorType = {
     PyVarObject_HEAD_INIT(&PyType_Type, 0)
     "solbert.ModelIterator", /*tp_name*/
@@ -106,7 +162,7 @@ static PyTypeObject ModelIteratorType = {
     0, /* tp_traverse */ 0, /* tp_clear */ 0, /* tp_richcompare */ 0, /* tp_weaklistoffset */
     PyObject_SelfIter, /* tp_iter: __iter__() method */
     (iternextfunc) model_iterator_next, /* tp_iternext: next() method */
-    0, /* tp_methods */ 0, /* tp_members */ 0, /* tp_getset */ 0, /* tp_base */ 0, /* tp_dict */
+    model_iterator_methods, /* tp_methods */ 0, /* tp_members */ 0, /* tp_getset */ 0, /* tp_base */ 0, /* tp_dict */
     0, /* tp_descr_get */ 0, /* tp_descr_set */ 0, /* tp_dictoffset */ 0, /* tp_init */
     PyType_GenericAlloc, /* tp_alloc */
     model_iterator_new, /* tp_new */
@@ -21,7 +21,9 @@ OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWA
 
 #include <vector>
 
-#include "lib/ipasir.h"
+#include "src/util/Checkpoint.h"
+#include "src/util/Progress.h"
+#include "src/util/Solver.h"
 
 #ifndef SRC_APPS_PRIMEIMPLICANTS_H_
 #define SRC_APPS_PRIMEIMPLICANTS_H_
@@ -31,57 +33,73 @@ OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWA
  * formula must resemble a monotonic function of inputs
  * inputs must be pure and positive in formula
  * 
+ * Inputs are frozen and decided false first, such that models start with few true inputs. 
+ * Only the clause blocking a prime implicant is permanent, the clauses shrinking a model 
+ * towards it are constraints of single solve calls (permanent clauses without native solver support). 
+ * 
  * @param formula 
  * @param inputs 
+ * @param checkpoint resume from and log prime implicants to checkpoint (optional)
+ * @param progress report progress to and stop early on interruption (optional, partial result)
  * @return std::vector<std::vector<int>> 
  */
-std::vector<std::vector<int>> get_prime_implicants(std::vector<std::vector<int>> formula, std::vector<int> inputs) {
+std::vector<std::vector<int>> get_prime_implicants(std::vector<std::vector<int>> formula, std::vector<int> inputs, Checkpoint* checkpoint = nullptr, Progress* progress = nullptr) {
     // initialize solver
-    void* S = ipasir_init();
-    for (std::vector<int>& clause : formula) {
-        for (int lit : clause) {
-            ipasir_add(S, lit);
-        }
-        ipasir_add(S, 0);
+    Solver S;
+    for (int var : inputs) {
+        S.freeze(var);
+        S.phase(-var);
     }
+    S.add_formula(formula);
 
     std::vector<std::vector<int>> prime_implicants;
 
-    bool result = (ipasir_solve(S) == 10);
+    // prime implicants of previous runs are blocking clauses
+    if (checkpoint != nullptr) {
+        prime_implicants = checkpoint->load();
+        for (std::vector<int>& prim : prime_implicants) {
+            S.add_clause(prim);
+            progress_found(progress);
+        }
+    }
+
+    bool result = (progress_solve(progress, S) == 10);
     while (result) { // determine models
         while (result) { // minimize model
             std::vector<int> minim;
             std::vector<int> facts;
             for (int var : inputs) {
-                if (ipasir_val(S, var) >= 0) {
+                if (S.val(var) >= 0) {
                     minim.push_back(-var);
                 } else {
                     facts.push_back(-var);
                 }
             }
 
-            for (int lit : minim) {
-                ipasir_add(S, lit);
-            }
-            ipasir_add(S, 0);
+            S.constrain(minim);
 
             for (int lit : facts) {
-                ipasir_assume(S, lit);
+                S.assume(lit);
             }
 
-            result = (ipasir_solve(S) == 10);
-            if (!result) {
+            result = (progress_solve(progress, S) == 10);
+            if (!result && !progress_stopped(progress)) {
                 // std::cout << "Found Prime Implicant: ";
                 // for (int lit : minim) std::cout << lit << " ";
                 // std::cout << std::endl;
+                if (Solver::native()) {
+                    S.add_clause(minim);
+                }
                 prime_implicants.push_back(minim);
+                if (checkpoint != nullptr) {
+                    checkpoint->append(minim);
+                }
+                progress_found(progress);
             }
         }
-        result = (ipasir_solve(S) == 10);
+        result = !progress_stopped(progress) && (progress_solve(progress, S) == 10);
     }
 
-    ipasir_release(S);
-
     return prime_implicants;
 }
 
@@ -21,84 +21,97 @@ OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWA
 
 #include <vector>
 
-#include "lib/ipasir.h"
+#include "src/util/Solver.h"
 
 #ifndef SRC_APPS_PRIMEIMPLICANTS2_H_
 #define SRC_APPS_PRIMEIMPLICANTS2_H_
 
-std::vector<std::vector<int>> get_prime_implicants2(std::vector<std::vector<int>> formula, std::vector<int> inputs) {
+struct SizeLimitExceeded : public std::exception {
+    const char* what() const throw() {
+        return "Exceeded Size Limit";
+    }
+};
+
+/**
+ * @brief Get prime implicants 
+ * enumeration stops early if more than limit prime implicants are found
+ * 
+ * @param formula 
+ * @param inputs 
+ * @param limit maximum number of prime implicants (0: unlimited)
+ * @return std::vector<std::vector<int>> 
+ */
+std::vector<std::vector<int>> get_prime_implicants2(std::vector<std::vector<int>> formula, std::vector<int> inputs, unsigned limit = 0) {
     // initialize enumerating solver
-    void* S = ipasir_init();
-    for (std::vector<int>& clause : formula) {
-        for (int lit : clause) {
-            ipasir_add(S, lit);
-        }
-        ipasir_add(S, 0);
+    Solver S;
+    for (int var : inputs) {
+        S.freeze(var);
     }
+    S.add_formula(formula);
 
     std::vector<std::vector<int>> prime_implicants;
 
-    bool result = (ipasir_solve(S) == 10);
+    bool result = (S.solve() == 10);
     while (result) {
         // initialize minimizing solver
-        void* S2 = ipasir_init();
+        Solver S2;
+        for (int var : inputs) {
+            S2.phase(-var);
+        }
         for (std::vector<int>& clause : formula) {
             for (int lit : clause) {
-                if (ipasir_val(S, lit) >= 0) {
-                    ipasir_add(S2, abs(lit));
+                if (S.val(lit) >= 0) {
+                    S2.add(abs(lit));
                 }
             }
-            ipasir_add(S2, 0);
+            S2.add(0);
         }
         // minimize model
-        result = (ipasir_solve(S2) == 10);
+        result = (S2.solve() == 10);
         while (result) {
             std::vector<int> minim;
             std::vector<int> facts;
             for (int var : inputs) {
-                if (ipasir_val(S2, var) >= 0) {
+                if (S2.val(var) >= 0) {
                     minim.push_back(-var);
                 } else {
                     facts.push_back(-var);
                 }
             }
 
-            for (int lit : minim) {
-                ipasir_add(S2, lit);
-            }
-            ipasir_add(S2, 0);
+            S2.constrain(minim);
 
             for (int lit : facts) {
-                ipasir_add(S2, lit);
-                ipasir_add(S2, 0);
+                S2.add_clause({ lit });
             }
 
-            result = (ipasir_solve(S2) == 10);
+            result = (S2.solve() == 10);
             if (!result) {
-                ipasir_release(S2);
                 std::vector<int> prim;
                 for (int lit : minim) {
-                    if (ipasir_val(S, lit) >= 0) {
+                    if (S.val(lit) >= 0) {
                         prim.push_back(lit);
                     } else {
                         prim.push_back(-lit);
                     }
                 }
                 prime_implicants.push_back(prim);
+                if (limit > 0 && prime_implicants.size() > limit) {
+                    throw SizeLimitExceeded();
+                }
 
+                std::vector<int> block;
                 for (int lit : prim) {
                     //std::cout << lit << " ";
-                    ipasir_add(S, -lit);
+                    block.push_back(-lit);
                 }
                 //std::cout << std::endl;
-                ipasir_add(S, 0);
+                S.add_clause(block);
             }
         }
-        result = (ipasir_solve(S) == 10);
+        result = (S.solve() == 10);
     }
 
-    ipasir_release(S);
-
     return prime_implicants;
 }
 
@@ -0,0 +1,157 @@
+/*************************************************************************************************
+Solbert -- Copyright (c) 2022, Markus Iser, KIT - Karlsruhe Institute of Technology
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and
+associated documentation files (the "Software"), to deal in the Software without restriction,
+including without limitation the rights to use, copy, modify, merge, publish, distribute,
+sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT
+NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT
+OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ **************************************************************************************************/
+
+#include <algorithm>
+#include <cstdlib>
+#include <vector>
+
+#include "src/util/Progress.h"
+#include "src/util/Solver.h"
+
+#ifndef SRC_APPS_SHORTESTPRIMEIMPLICANTS_H_
+#define SRC_APPS_SHORTESTPRIMEIMPLICANTS_H_
+
+/**
+ * @brief Totalizer over the given literals, truncated at cap outputs
+ * output i (0-based) is implied if at least i+1 of the literals are true
+ */
+class Totalizer {
+    Solver& S;
+    int& nvars;
+    unsigned cap;
+
+    std::vector<int> merge(const std::vector<int>& a, const std::vector<int>& b) {
+        std::vector<int> out;
+        unsigned n = std::min<unsigned>(a.size() + b.size(), cap);
+        for (unsigned i = 0; i < n; ++i) {
+            out.push_back(++nvars);
+        }
+        for (unsigned i = 0; i <= a.size(); ++i) {
+            for (unsigned j = 0; j <= b.size(); ++j) {
+                if (i + j == 0) continue;
+                unsigned k = std::min(i + j, n);
+                if (i > 0) S.add(-a[i-1]);
+                if (j > 0) S.add(-b[j-1]);
+                S.add(out[k-1]);
+                S.add(0);
+            }
+        }
+        return out;
+    }
+
+    std::vector<int> build(const std::vector<int>& lits, unsigned begin, unsigned end) {
+        if (end - begin == 1) {
+            return { lits[begin] };
+        }
+        unsigned mid = begin + (end - begin) / 2;
+        return merge(build(lits, begin, mid), build(lits, mid, end));
+    }
+
+ public:
+    std::vector<int> outputs;
+
+    Totalizer(Solver& solver, int& maxvar, const std::vector<int>& lits, unsigned limit) : S(solver), nvars(maxvar), cap(limit) {
+        if (lits.size() > 0) {
+            outputs = build(lits, 0, lits.size());
+        }
+    }
+
+    // literal which enforces that at most bound of the literals are true
+    int at_most(unsigned bound) const {
+        return bound < outputs.size() ? -outputs[bound] : 0;
+    }
+};
+
+/**
+ * @brief Get prime implicants in non-decreasing order of their size
+ * formula must resemble a monotonic function of inputs
+ * inputs must be pure and positive in formula
+ * 
+ * At bound b all prime implicants smaller than b are already blocked, 
+ * so every model with at most b true inputs is a prime implicant of size b
+ * 
+ * @param formula 
+ * @param inputs 
+ * @param k stop after k prime implicants (0: unlimited)
+ * @param max_size stop after prime implicants of size max_size (0: unlimited)
+ * @param progress report progress to and stop early on interruption (optional, partial result)
+ * @return std::vector<std::vector<int>> 
+ */
+std::vector<std::vector<int>> get_shortest_prime_implicants(std::vector<std::vector<int>> formula, std::vector<int> inputs, unsigned k = 0, unsigned max_size = 0, Progress* progress = nullptr) {
+    if (max_size == 0 || max_size > inputs.size()) {
+        max_size = inputs.size();
+    }
+
+    // initialize solver
+    Solver S;
+    int nvars = 0;
+    for (int var : inputs) {
+        nvars = std::max(nvars, abs(var));
+        S.freeze(var);
+        S.phase(-var);
+    }
+    for (std::vector<int>& clause : formula) {
+        for (int lit : clause) {
+            nvars = std::max(nvars, abs(lit));
+        }
+        S.add_clause(clause);
+    }
+
+    // outputs beyond max_size+1 are never assumed
+    Totalizer totalizer(S, nvars, inputs, max_size + 1);
+
+    std::vector<std::vector<int>> prime_implicants;
+
+    for (unsigned bound = 0; bound <= max_size; ++bound) {
+        int assumption = totalizer.at_most(bound);
+        while (true) {
+            if (assumption != 0) {
+                S.assume(assumption);
+            }
+            if (progress_solve(progress, S) != 10) {
+                break;
+            }
+            std::vector<int> prim;
+            for (int var : inputs) {
+                if (S.val(var) > 0) {
+                    prim.push_back(-var);
+                }
+            }
+            prime_implicants.push_back(prim);
+            progress_found(progress);
+            if (k > 0 && prime_implicants.size() >= k) {
+                return prime_implicants;
+            }
+            // block all supersets
+            S.add_clause(prim);
+        }
+        // the last solve call was interrupted
+        if (progress_stopped(progress)) {
+            break;
+        }
+        // unsatisfiable regardless of the bound: all prime implicants found
+        if (assumption == 0 || !S.failed(assumption)) {
+            break;
+        }
+    }
+
+    return prime_implicants;
+}
+
+#endif  // SRC_APPS_SHORTESTPRIMEIMPLICANTS_H_
@@ -0,0 +1,210 @@
+/*************************************************************************************************
+Solbert -- Copyright (c) 2022, Markus Iser, KIT - Karlsruhe Institute of Technology
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and
+associated documentation files (the "Software"), to deal in the Software without restriction,
+including without limitation the rights to use, copy, modify, merge, publish, distribute,
+sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT
+NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT
+OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ **************************************************************************************************/
+
+#include <stdexcept>
+#include <vector>
+
+#include "src/util/Solver.h"
+
+#include "src/util/PyUtil.h"
+#include "src/apps/ClauseStoreObject.h"
+
+#ifndef SRC_APPS_SOLVEROBJECT_H_
+#define SRC_APPS_SOLVEROBJECT_H_
+
+/**
+ * @brief Warm incremental solver, keeps learnt clauses between solve calls under assumptions
+ * solve releases the GIL, a solver must not be used by two threads at once (raises RuntimeError)
+ */
+typedef struct SolverObject {
+    PyObject_HEAD
+    Solver* solver;
+    bool busy;
+    int result;  // of the last solve call (10: sat, 20: unsat), 0 before and after adding clauses
+} SolverObject;
+
+static bool solver_acquire(SolverObject* obj) {
+    if (obj->busy) {
+        PyErr_SetString(PyExc_RuntimeError, "solver is busy");
+        return false;
+    }
+    return true;
+}
+
+// failed() and values() are only defined right after an unsatisfiable or satisfiable solve call (the native backend aborts otherwise)
+static bool solver_expect(SolverObject* obj, int result, const char* what) {
+    if (obj->result != result) {
+        PyErr_Format(PyExc_RuntimeError, "%s requires the last solve call to be %s", what, result == 10 ? "satisfiable" : "unsatisfiable");
+        return false;
+    }
+    return true;
+}
+
+static PyObject* solver_new(PyTypeObject *type, PyObject *args, PyObject *kwargs) {
+    PyObject* pyformula = nullptr;
+    if (!PyArg_ParseTuple(args, "|O", &pyformula)) {
+        return nullptr;
+    }
+
+    std::vector<std::vector<int>> formula;
+    try {
+        if (pyformula != nullptr) {
+            formula = get_formula(pyformula, nullptr);
+        }
+    } catch (std::invalid_argument& e) {
+        PyErr_SetString(PyExc_TypeError, e.what());
+        return nullptr;
+    }
+
+    SolverObject* obj = (SolverObject*) type->tp_alloc(type, 0);
+    if (obj == nullptr) {
+        return nullptr;
+    }
+    obj->solver = new Solver();
+    obj->busy = false;
+    obj->result = 0;
+    obj->solver->add_formula(formula);
+    return (PyObject*) obj;
+}
+
+static void solver_delete(SolverObject* obj) {
+    delete obj->solver;
+    Py_TYPE(obj)->tp_free((PyObject*) obj);
+}
+
+static PyObject* solver_add(PyObject* self, PyObject* args) {
+    SolverObject* obj = (SolverObject*) self;
+    PyObject* pyclauses;
+    if (!PyArg_ParseTuple(args, "O", &pyclauses) || !solver_acquire(obj)) {
+        return nullptr;
+    }
+    try {
+        std::vector<std::vector<int>> clauses = list_to_formula(pyclauses);
+        obj->result = 0;
+        obj->solver->add_formula(clauses);
+    } catch (std::invalid_argument& e) {
+        PyErr_SetString(PyExc_TypeError, e.what());
+        return nullptr;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyObject* solver_solve(PyObject* self, PyObject* args) {
+    SolverObject* obj = (SolverObject*) self;
+    PyObject* pyassumptions = nullptr;
+    if (!PyArg_ParseTuple(args, "|O", &pyassumptions) || !solver_acquire(obj)) {
+        return nullptr;
+    }
+    std::vector<int> assumptions;
+    try {
+        if (pyassumptions != nullptr) {
+            assumptions = list_to_vec(pyassumptions);
+        }
+    } catch (std::invalid_argument& e) {
+        PyErr_SetString(PyExc_TypeError, e.what());
+        return nullptr;
+    }
+    int result;
+    obj->busy = true;
+    Py_BEGIN_ALLOW_THREADS
+    for (int lit : assumptions) {
+        obj->solver->assume(lit);
+    }
+    result = obj->solver->solve();
+    Py_END_ALLOW_THREADS
+    obj->busy = false;
+    obj->result = result;
+    if (result == 10) Py_RETURN_TRUE;
+    if (result == 20) Py_RETURN_FALSE;
+    Py_RETURN_NONE;
+}
+
+// the given assumptions of the last unsatisfiable solve call which are part of the final conflict
+static PyObject* solver_failed(PyObject* self, PyObject* args) {
+    SolverObject* obj = (SolverObject*) self;
+    PyObject* pylits;
+    if (!PyArg_ParseTuple(args, "O", &pylits) || !solver_acquire(obj) || !solver_expect(obj, 20, "failed")) {
+        return nullptr;
+    }
+    try {
+        std::vector<int> failed;
+        for (int lit : list_to_vec(pylits)) {
+            if (lit == 0) {
+                throw std::invalid_argument("literal must not be 0");
+            }
+            if (obj->solver->failed(lit)) {
+                failed.push_back(lit);
+            }
+        }
+        return vec_to_list(failed);
+    } catch (std::invalid_argument& e) {
+        PyErr_SetString(PyExc_TypeError, e.what());
+        return nullptr;
+    }
+}
+
+// the literals of the given variables in the model of the last satisfiable solve call
+static PyObject* solver_values(PyObject* self, PyObject* args) {
+    SolverObject* obj = (SolverObject*) self;
+    PyObject* pyvars;
+    if (!PyArg_ParseTuple(args, "O", &pyvars) || !solver_acquire(obj) || !solver_expect(obj, 10, "values")) {
+        return nullptr;
+    }
+    try {
+        std::vector<int> values;
+        for (int var : list_to_vec(pyvars)) {
+            if (var == 0) {
+                throw std::invalid_argument("variable must not be 0");
+            }
+            values.push_back(obj->solver->val(var) > 0 ? var : -var);
+        }
+        return vec_to_list(values);
+    } catch (std::invalid_argument& e) {
+        PyErr_SetString(PyExc_TypeError, e.what());
+        return nullptr;
+    }
+}
+
+static PyMethodDef solver_methods[] = {
+    {"add", solver_add, METH_VARARGS, "Add a list of clauses"},
+    {"solve", solver_solve, METH_VARARGS, "Solve under a list of assumptions (True: sat, False: unsat, None: unknown)"},
+    {"failed", solver_failed, METH_VARARGS, "Failed assumptions among the given literals (after an unsatisfiable solve call, raises RuntimeError otherwise)"},
+    {"values", solver_values, METH_VARARGS, "Model literals of the given variables (after a satisfiable solve call, raises RuntimeError otherwise)"},
+    {nullptr, nullptr, 0, nullptr}
+};
+
+static PyTypeObject SolverType = {
+    PyVarObject_HEAD_INIT(&PyType_Type, 0)
+    "solbert.Solver", /*tp_name*/
+    sizeof(SolverObject), /*tp_basicsize*/
+    0, /*tp_itemsize*/
+    (destructor) solver_delete, /*tp_dealloc*/
+    0, /*tp_print*/ 0, /*tp_getattr*/ 0, /*tp_setattr*/ 0, /*tp_compare*/ 0, /*tp_repr*/ 0, /*tp_as_number*/ 0, /*tp_as_sequence*/
+    0, /*tp_as_mapping*/ 0, /*tp_hash */ 0, /*tp_call*/ 0, /*tp_str*/ 0, /*tp_getattro*/ 0, /*tp_setattro*/ 0, /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT, /* tp_flags */
+    "solbert incremental solver: formula (list of clauses or clause_store) kept warm across solve calls.", /* tp_doc */
+    0, /* tp_traverse */ 0, /* tp_clear */ 0, /* tp_richcompare */ 0, /* tp_weaklistoffset */
+    0, /* tp_iter */ 0, /* tp_iternext */
+    solver_methods, /* tp_methods */ 0, /* tp_members */ 0, /* tp_getset */ 0, /* tp_base */ 0, /* tp_dict */
+    0, /* tp_descr_get */ 0, /* tp_descr_set */ 0, /* tp_dictoffset */ 0, /* tp_init */
+    PyType_GenericAlloc, /* tp_alloc */
+    solver_new, /* tp_new */
+};
+
+#endif  // SRC_APPS_SOLVEROBJECT_H_
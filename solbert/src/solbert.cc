@@ -18,45 +18,74 @@ OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWA
  **************************************************************************************************/
 
 #include <cstdio>
+#include <memory>
 #include <vector>
 
 #include "src/util/PyUtil.h"
 #include "src/util/ResourceLimits.h"
+#include "src/util/Progress.h"
+#include "src/util/Solver.h"
 
 #include "src/apps/PrimeImplicants.h"
 #include "src/apps/EnumerateModels.h"
 
 #include "src/apps/ModelIterator.h"
 #include "src/apps/PrimeImplicants2.h"
+#include "src/apps/ClauseStoreObject.h"
+#include "src/apps/ShortestPrimeImplicants.h"
+#include "src/apps/SolverObject.h"
 
 
+// result of an interruptible enumeration: python error of a signal handler or callback, 
+// (partial) result otherwise
+static PyObject* finish(Progress& progress, const std::vector<std::vector<int>>& result) {
+    if (!progress.error()) {
+        progress.report();
+    }
+    if (progress.error()) {
+        return nullptr;
+    }
+    return formula_to_list(result);
+}
 
-static PyObject* compute_prime_implicants(PyObject* self, PyObject* arg) {
+
+static PyObject* compute_prime_implicants(PyObject* self, PyObject* arg, PyObject* kwargs) {
+    static const char* keywords[] = { "formula", "inputs", "rlim", "mlim", "checkpoint", "flush", "progress", "interval", "cancel", nullptr };
     PyObject* pyformula;
     PyObject* pyinputs;
-    unsigned rlim = 0, mlim = 0;
-    PyArg_ParseTuple(arg, "OO|II", &pyformula, &pyinputs, &rlim, &mlim);
-    std::vector<std::vector<int>> formula = list_to_formula(pyformula);
-    std::vector<int> inputs = list_to_vec(pyinputs);
+    PyObject* callback = nullptr;
+    PyObject* token = nullptr;
+    unsigned rlim = 0, mlim = 0, interval = 10;
+    double report = 1.0;
+    const char* path = nullptr;
+    if (!PyArg_ParseTupleAndKeywords(arg, kwargs, "OO|IIzI$OdO", const_cast<char**>(keywords), 
+            &pyformula, &pyinputs, &rlim, &mlim, &path, &interval, &callback, &report, &token)) {
+        return nullptr;
+    }
 
     ResourceLimits limits(rlim, mlim);
-    limits.set_rlimits();
     try {
-        // compute prime implicants guarded
-        std::vector<std::vector<int>> pis = get_prime_implicants(formula, inputs);
-        PyObject* obj = pylist();
-        for (std::vector<int>& pi : pis) {
-            PyObject* obj2 = pylist();
-            for (int lit : pi) {
-                pylist(obj2, lit);
-            }
-            pylist(obj, obj2);
+        std::vector<std::vector<int>> formula = get_formula(pyformula, nullptr);
+        std::vector<int> inputs = list_to_vec(pyinputs);
+        std::unique_ptr<Checkpoint> checkpoint;
+        if (path != nullptr) {
+            checkpoint.reset(new Checkpoint(path, Checkpoint::hash(formula, inputs), interval));
         }
-        return obj;
+        Progress progress(callback, token, report);
+        limits.set_rlimits();
+        // compute prime implicants guarded
+        std::vector<std::vector<int>> pis = get_prime_implicants(formula, inputs, checkpoint.get(), &progress);
+        return finish(progress, pis);
     } catch (TimeLimitExceeded& e) {
         return pytype("timeout");
     } catch (MemoryLimitExceeded& e) {
         return pytype("memout");
+    } catch (std::invalid_argument& e) {
+        PyErr_SetString(PyExc_TypeError, e.what());
+        return nullptr;
+    } catch (std::runtime_error& e) {
+        PyErr_SetString(PyExc_OSError, e.what());
+        return nullptr;
     }
 }
 
@@ -64,68 +93,116 @@ static PyObject* compute_prime_implicants(PyObject* self, PyObject* arg) {
 static PyObject* compute_prime_implicants2(PyObject* self, PyObject* arg) {
     PyObject* pyformula;
     PyObject* pyinputs;
-    unsigned rlim = 0, mlim = 0;
-    PyArg_ParseTuple(arg, "OO|II", &pyformula, &pyinputs, &rlim, &mlim);
+    PyObject* pyclauses = nullptr;
+    unsigned rlim = 0, mlim = 0, limit = 0;
+    if (!PyArg_ParseTuple(arg, "OO|IIOI", &pyformula, &pyinputs, &rlim, &mlim, &pyclauses, &limit)) {
+        return nullptr;
+    }
 
     ResourceLimits limits(rlim, mlim);
     limits.set_rlimits();
     try {
         // compute prime implicants guarded
-        std::vector<std::vector<int>> formula = list_to_formula(pyformula);
+        std::vector<std::vector<int>> formula = get_formula(pyformula, pyclauses);
         std::vector<int> inputs = list_to_vec(pyinputs);
         
-        std::vector<std::vector<int>> pis = get_prime_implicants2(formula, inputs);
-        PyObject* obj = pylist();
-        for (std::vector<int>& pi : pis) {
-            PyObject* obj2 = pylist();
-            for (int lit : pi) {
-                pylist(obj2, lit);
-            }
-            pylist(obj, obj2);
-        }
-        return obj;
+        std::vector<std::vector<int>> pis = get_prime_implicants2(formula, inputs, limit);
+        return formula_to_list(pis);
     } catch (TimeLimitExceeded& e) {
         return pytype("timeout");
     } catch (MemoryLimitExceeded& e) {
         return pytype("memout");
+    } catch (SizeLimitExceeded& e) {
+        return pytype("sizeout");
+    } catch (std::out_of_range& e) {
+        PyErr_SetString(PyExc_IndexError, e.what());
+        return nullptr;
+    } catch (std::invalid_argument& e) {
+        PyErr_SetString(PyExc_TypeError, e.what());
+        return nullptr;
     }
 }
 
 
-static PyObject* enumerate_models(PyObject* self, PyObject* arg) {
+static PyObject* compute_shortest_prime_implicants(PyObject* self, PyObject* arg, PyObject* kwargs) {
+    static const char* keywords[] = { "formula", "inputs", "rlim", "mlim", "k", "max_size", "progress", "interval", "cancel", nullptr };
     PyObject* pyformula;
     PyObject* pyinputs;
+    PyObject* callback = nullptr;
+    PyObject* token = nullptr;
+    unsigned rlim = 0, mlim = 0, k = 0, max_size = 0;
+    double report = 1.0;
+    if (!PyArg_ParseTupleAndKeywords(arg, kwargs, "OO|IIII$OdO", const_cast<char**>(keywords), 
+            &pyformula, &pyinputs, &rlim, &mlim, &k, &max_size, &callback, &report, &token)) {
+        return nullptr;
+    }
+
+    ResourceLimits limits(rlim, mlim);
+    try {
+        std::vector<std::vector<int>> formula = get_formula(pyformula, nullptr);
+        std::vector<int> inputs = list_to_vec(pyinputs);
+        Progress progress(callback, token, report);
+        limits.set_rlimits();
+        // compute prime implicants guarded
+        std::vector<std::vector<int>> pis = get_shortest_prime_implicants(formula, inputs, k, max_size, &progress);
+        return finish(progress, pis);
+    } catch (TimeLimitExceeded& e) {
+        return pytype("timeout");
+    } catch (MemoryLimitExceeded& e) {
+        return pytype("memout");
+    } catch (std::invalid_argument& e) {
+        PyErr_SetString(PyExc_TypeError, e.what());
+        return nullptr;
+    }
+}
+
+
+static PyObject* enumerate_models(PyObject* self, PyObject* arg, PyObject* kwargs) {
+    static const char* keywords[] = { "formula", "inputs", "rlim", "mlim", "progress", "interval", "cancel", nullptr };
+    PyObject* pyformula;
+    PyObject* pyinputs;
+    PyObject* callback = nullptr;
+    PyObject* token = nullptr;
     unsigned rlim = 0, mlim = 0;
-    PyArg_ParseTuple(arg, "OO|II", &pyformula, &pyinputs, &rlim, &mlim);
-    std::vector<std::vector<int>> formula = list_to_formula(pyformula);
-    std::vector<int> inputs = list_to_vec(pyinputs);
+    double report = 1.0;
+    if (!PyArg_ParseTupleAndKeywords(arg, kwargs, "OO|II$OdO", const_cast<char**>(keywords), 
+            &pyformula, &pyinputs, &rlim, &mlim, &callback, &report, &token)) {
+        return nullptr;
+    }
 
     ResourceLimits limits(rlim, mlim);
-    limits.set_rlimits();
     try {
+        std::vector<std::vector<int>> formula = list_to_formula(pyformula);
+        std::vector<int> inputs = list_to_vec(pyinputs);
+        Progress progress(callback, token, report);
+        limits.set_rlimits();
         // enumerate models guarded
-        std::vector<std::vector<int>> pis = get_models(formula, inputs);
-        PyObject* obj = pylist();
-        for (std::vector<int>& pi : pis) {
-            PyObject* obj2 = pylist();
-            for (int lit : pi) {
-                pylist(obj2, lit);
-            }
-            pylist(obj, obj2);
-        }
-        return obj;
+        std::vector<std::vector<int>> models = get_models(formula, inputs, &progress);
+        return finish(progress, models);
     } catch (TimeLimitExceeded& e) {
         return pytype("timeout");
     } catch (MemoryLimitExceeded& e) {
         return pytype("memout");
+    } catch (std::invalid_argument& e) {
+        PyErr_SetString(PyExc_TypeError, e.what());
+        return nullptr;
     }
 }
 
 
+static PyObject* backend(PyObject* self, PyObject* arg) {
+    return PyUnicode_FromString(Solver::signature());
+}
+
+
 static PyMethodDef methods[] = {
-    {"compute_prime_implicants", compute_prime_implicants, METH_VARARGS, "Compute Prime Implicants"},
-    {"compute_prime_implicants2", compute_prime_implicants2, METH_VARARGS, "Compute Prime Implicants"},
-    {"enumerate_models", enumerate_models, METH_VARARGS, "Enumerate Models"},
+    {"compute_prime_implicants", (PyCFunction)(void(*)(void)) compute_prime_implicants, METH_VARARGS | METH_KEYWORDS, "Compute Prime Implicants (formula may be a clause_store, a flat int32 buffer of 0-terminated clauses or a tuple of such parts; resumes from and logs to the checkpoint file if given, flushed every flush seconds; "
+        "calls progress with a dict of found, solves and seconds every interval seconds; returns the partial result once the cancel token is set)"},
+    {"compute_prime_implicants2", compute_prime_implicants2, METH_VARARGS, "Compute Prime Implicants (formula may be a clause_store, optionally restricted to a list of clause ids; returns 'sizeout' if more than limit prime implicants exist)"},
+    {"compute_shortest_prime_implicants", (PyCFunction)(void(*)(void)) compute_shortest_prime_implicants, METH_VARARGS | METH_KEYWORDS, "Compute Prime Implicants in non-decreasing order of size (stops after k prime implicants or beyond max_size; 0: unlimited; "
+        "progress, interval and cancel as in compute_prime_implicants)"},
+    {"enumerate_models", (PyCFunction)(void(*)(void)) enumerate_models, METH_VARARGS | METH_KEYWORDS, "Enumerate Models (progress, interval and cancel as in compute_prime_implicants)"},
+    {"backend", backend, METH_NOARGS, "Signature of the SAT solver backend"},
     {nullptr, nullptr, 0, nullptr}
 };
 
@@ -137,8 +214,23 @@ static struct PyModuleDef solbert = {
 PyMODINIT_FUNC PyInit_solbert(void) {
     PyObject* mod = PyModule_Create(&solbert);
 
+    if (PyType_Ready(&ModelIteratorType) < 0) {
+        return nullptr;
+    }
     Py_INCREF((PyObject*) &ModelIteratorType);
     PyModule_AddObject(mod, "model_iterator", (PyObject*) &ModelIteratorType);
 
+    if (PyType_Ready(&ClauseStoreType) < 0) {
+        return nullptr;
+    }
+    Py_INCREF((PyObject*) &ClauseStoreType);
+    PyModule_AddObject(mod, "clause_store", (PyObject*) &ClauseStoreType);
+
+    if (PyType_Ready(&SolverType) < 0) {
+        return nullptr;
+    }
+    Py_INCREF((PyObject*) &SolverType);
+    PyModule_AddObject(mod, "solver", (PyObject*) &SolverType);
+
     return mod;
 }
@@ -0,0 +1,133 @@
+/*************************************************************************************************
+Solbert -- Copyright (c) 2022, Markus Iser, KIT - Karlsruhe Institute of Technology
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and
+associated documentation files (the "Software"), to deal in the Software without restriction,
+including without limitation the rights to use, copy, modify, merge, publish, distribute,
+sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT
+NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT
+OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ **************************************************************************************************/
+
+#ifndef SRC_UTIL_CHECKPOINT_H_
+#define SRC_UTIL_CHECKPOINT_H_
+
+#include <cstdint>
+#include <cstdio>
+#include <ctime>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+#include <unistd.h>
+
+/**
+ * @brief Append-only binary log of prime implicants for resuming enumerations
+ * header: magic, version, formula hash; records: uint32 size, int32 literals[size]
+ * the file is only resumed if the hash of formula and inputs matches, 
+ * a truncated last record (process killed while writing) is dropped
+ */
+class Checkpoint {
+    static constexpr uint32_t MAGIC = 0x49504253;  // "SBPI"
+    static constexpr uint32_t VERSION = 1;
+
+    std::string path_;
+    uint64_t hash_;
+    unsigned interval_;  // seconds between flushes
+    time_t last_;
+    FILE* file_ = nullptr;
+
+    static void fnv1a(uint64_t& h, int32_t val) {
+        uint32_t v = static_cast<uint32_t>(val);
+        for (int i = 0; i < 4; ++i) {
+            h ^= (v >> (8 * i)) & 0xFF;
+            h *= 0x100000001B3ULL;
+        }
+    }
+
+ public:
+    static uint64_t hash(const std::vector<std::vector<int>>& formula, const std::vector<int>& inputs) {
+        uint64_t h = 0xCBF29CE484222325ULL;
+        for (const std::vector<int>& clause : formula) {
+            for (int lit : clause) fnv1a(h, lit);
+            fnv1a(h, 0);
+        }
+        fnv1a(h, 0);
+        for (int var : inputs) fnv1a(h, var);
+        return h;
+    }
+
+    Checkpoint(const char* path, uint64_t hash, unsigned interval = 10) : path_(path), hash_(hash), interval_(interval) {
+        last_ = time(nullptr);
+    }
+
+    ~Checkpoint() {
+        if (file_ != nullptr) {
+            fclose(file_);
+        }
+    }
+
+    Checkpoint(const Checkpoint&) = delete;
+    Checkpoint& operator=(const Checkpoint&) = delete;
+
+    /**
+     * @brief Read the prime implicants of a matching checkpoint and open it for appending
+     * (starts a new checkpoint if the file is missing or belongs to another formula)
+     */
+    std::vector<std::vector<int>> load() {
+        std::vector<std::vector<int>> records;
+        long valid = 0;
+        FILE* in = fopen(path_.c_str(), "rb");
+        if (in != nullptr) {
+            uint32_t magic, version;
+            uint64_t hash;
+            if (fread(&magic, 4, 1, in) == 1 && fread(&version, 4, 1, in) == 1 && fread(&hash, 8, 1, in) == 1
+                && magic == MAGIC && version == VERSION && hash == hash_) {
+                valid = ftell(in);
+                uint32_t size;
+                while (fread(&size, 4, 1, in) == 1) {
+                    std::vector<int> record(size);
+                    if (size > 0 && fread(record.data(), 4, size, in) != size) break;
+                    records.push_back(record);
+                    valid = ftell(in);
+                }
+            }
+            fclose(in);
+        }
+        if (valid > 0) {
+            if (truncate(path_.c_str(), valid) != 0 || (file_ = fopen(path_.c_str(), "ab")) == nullptr) {
+                throw std::runtime_error("cannot open checkpoint " + path_);
+            }
+        } else {
+            if ((file_ = fopen(path_.c_str(), "wb")) == nullptr) {
+                throw std::runtime_error("cannot open checkpoint " + path_);
+            }
+            fwrite(&MAGIC, 4, 1, file_);
+            fwrite(&VERSION, 4, 1, file_);
+            fwrite(&hash_, 8, 1, file_);
+            fflush(file_);
+        }
+        return records;
+    }
+
+    void append(const std::vector<int>& record) {
+        uint32_t size = record.size();
+        fwrite(&size, 4, 1, file_);
+        fwrite(record.data(), 4, size, file_);
+        time_t now = time(nullptr);
+        if (now - last_ >= static_cast<time_t>(interval_)) {
+            fflush(file_);
+            last_ = now;
+        }
+    }
+};
+
+#endif  // SRC_UTIL_CHECKPOINT_H_
@@ -0,0 +1,95 @@
+/*************************************************************************************************
+Solbert -- Copyright (c) 2022, Markus Iser, KIT - Karlsruhe Institute of Technology
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and
+associated documentation files (the "Software"), to deal in the Software without restriction,
+including without limitation the rights to use, copy, modify, merge, publish, distribute,
+sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT
+NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT
+OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ **************************************************************************************************/
+
+#ifndef SRC_UTIL_CLAUSESTORE_H_
+#define SRC_UTIL_CLAUSESTORE_H_
+
+#include <cstdint>
+#include <cstdlib>
+#include <vector>
+
+#include "src/util/StreamBuffer.h"
+
+/**
+ * @brief Compact clause database: all literals in one flat array, 
+ * clause i spans literals [offsets[i], offsets[i+1])
+ */
+struct ClauseStore {
+    std::vector<int32_t> literals;
+    std::vector<uint64_t> offsets { 0 };
+    unsigned nvars = 0;
+
+    size_t size() const {
+        return offsets.size() - 1;
+    }
+
+    const int32_t* begin(size_t i) const {
+        return literals.data() + offsets[i];
+    }
+
+    const int32_t* end(size_t i) const {
+        return literals.data() + offsets[i+1];
+    }
+
+    std::vector<int> clause(size_t i) const {
+        return std::vector<int>(begin(i), end(i));
+    }
+
+    void add(int lit) {
+        unsigned var = static_cast<unsigned>(std::abs(lit));
+        if (var > nvars) nvars = var;
+        literals.push_back(lit);
+    }
+
+    void commit() {
+        offsets.push_back(literals.size());
+    }
+
+    void read_dimacs(const char* filename) {
+        StreamBuffer in(filename);
+        while (!in.eof()) {
+            in.skipWhitespace();
+            if (in.eof()) {
+                break;
+            } else if (*in == 'c' || *in == 'p') {
+                if (in.skipString("p cnf")) {
+                    unsigned vars = in.readInteger();
+                    if (vars > nvars) nvars = vars;
+                    uint64_t clauses = in.readInteger();
+                    offsets.reserve(clauses + 1);
+                }
+                in.skipLine();
+            } else {
+                int lit = in.readInteger();
+                if (lit == 0) {
+                    commit();
+                } else {
+                    add(lit);
+                }
+            }
+        }
+        if (literals.size() > offsets.back()) {  // last clause not terminated
+            commit();
+        }
+        literals.shrink_to_fit();
+        offsets.shrink_to_fit();
+    }
+};
+
+#endif  // SRC_UTIL_CLAUSESTORE_H_
@@ -0,0 +1,168 @@
+/*************************************************************************************************
+Solbert -- Copyright (c) 2022, Markus Iser, KIT - Karlsruhe Institute of Technology
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and
+associated documentation files (the "Software"), to deal in the Software without restriction,
+including without limitation the rights to use, copy, modify, merge, publish, distribute,
+sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT
+NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT
+OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ **************************************************************************************************/
+
+#ifndef SRC_UTIL_PROGRESS_H_
+#define SRC_UTIL_PROGRESS_H_
+
+#include "Python.h"
+
+#include <chrono>
+
+#include "src/util/PyUtil.h"
+#include "src/util/Solver.h"
+
+/**
+ * @brief Progress reports and interruption of long running enumerations
+ * 
+ * Solver calls run without the GIL. Pending signals are checked after each solver call and periodically during search 
+ * (via the terminate callback of the solver), the cancel token at most every 50 milliseconds 
+ * (it may be a proxy such as a multiprocessing.Manager().Event() whose is_set() is a round trip to the manager).
+ * A signal handler that raises (e.g. KeyboardInterrupt on Ctrl-C) stops the enumeration with that error set,
+ * a set cancel token (any object with is_set(), e.g. threading.Event) stops it regularly with partial results.
+ * The callback is called with a dict of found, solves and seconds at most every interval seconds and once at the end.
+ */
+class Progress {
+    typedef std::chrono::steady_clock clock;
+
+    PyObject* callback;
+    PyObject* token;
+    double interval;
+    clock::time_point start;
+    clock::time_point last_report;
+    clock::time_point last_check;
+    clock::time_point last_token;
+
+    bool failed = false;
+    bool cancelled = false;
+
+    static int terminate(void* data) {
+        Progress* progress = static_cast<Progress*>(data);
+        if (progress->elapsed(progress->last_check) < 0.05) {
+            return 0;
+        }
+        PyGILState_STATE state = PyGILState_Ensure();
+        progress->poll();
+        PyGILState_Release(state);
+        return progress->stopped() ? 1 : 0;
+    }
+
+    static double elapsed(clock::time_point since) {
+        return std::chrono::duration<double>(clock::now() - since).count();
+    }
+
+    // gil must be held
+    void poll() {
+        last_check = clock::now();
+        if (stopped()) {
+            return;
+        }
+        if (PyErr_CheckSignals() < 0) {
+            failed = true;
+            return;
+        }
+        if (token != nullptr && token != Py_None && elapsed(last_token) >= 0.05) {
+            last_token = clock::now();
+            PyObject* set = PyObject_CallMethod(token, "is_set", nullptr);
+            if (set == nullptr) {
+                failed = true;
+                return;
+            }
+            cancelled = PyObject_IsTrue(set) == 1;
+            Py_DECREF(set);
+        }
+        if (elapsed(last_report) >= interval) {
+            report();
+        }
+    }
+
+    // releases the gil for the lifetime of the guard (also if the solver is left by an exception)
+    struct Unlock {
+        PyThreadState* state;
+        Unlock() : state(PyEval_SaveThread()) { }
+        ~Unlock() { PyEval_RestoreThread(state); }
+    };
+
+ public:
+    unsigned found = 0;
+    unsigned solves = 0;
+
+    Progress(PyObject* callback_, PyObject* token_, double interval_) : callback(callback_), token(token_), interval(interval_) {
+        start = last_report = last_check = clock::now();
+        last_token = start - std::chrono::seconds(1);
+    }
+
+    int solve(Solver& S) {
+        ++solves;
+        S.set_terminate(this, terminate);
+        int result;
+        {
+            Unlock unlock;
+            result = S.solve();
+        }
+        poll();
+        return stopped() ? 0 : result;
+    }
+
+    // gil must be held
+    void report() {
+        last_report = clock::now();
+        if (failed || callback == nullptr || callback == Py_None) {
+            return;
+        }
+        PyObject* stats = pydict();
+        pydict(stats, "found", found);
+        pydict(stats, "solves", solves);
+        PyObject* seconds = PyFloat_FromDouble(elapsed(start));
+        PyDict_SetItemString(stats, "seconds", seconds);
+        Py_DECREF(seconds);
+        PyObject* res = PyObject_CallFunctionObjArgs(callback, stats, nullptr);
+        Py_DECREF(stats);
+        if (res == nullptr) {
+            failed = true;
+        } else {
+            Py_DECREF(res);
+        }
+    }
+
+    bool stopped() const {
+        return failed || cancelled;
+    }
+
+    // a python exception is set
+    bool error() const {
+        return failed;
+    }
+};
+
+// solve with progress reports and interruption if progress is given
+static int progress_solve(Progress* progress, Solver& S) {
+    return progress != nullptr ? progress->solve(S) : S.solve();
+}
+
+static bool progress_stopped(Progress* progress) {
+    return progress != nullptr && progress->stopped();
+}
+
+static void progress_found(Progress* progress) {
+    if (progress != nullptr) {
+        ++progress->found;
+    }
+}
+
+#endif  // SRC_UTIL_PROGRESS_H_
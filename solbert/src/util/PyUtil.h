@@ -22,6 +22,11 @@ OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWA
 
 #include "Python.h"
 
+#include <climits>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
 static PyObject* pytype(int val) {
     return Py_BuildValue("i", val);
 }
@@ -44,7 +49,11 @@ static PyObject* pydict() {
 
 template<typename T>
 static void pydict(PyObject* dict, const char* key, T val) {
-    PyDict_SetItem(dict, pytype(key), pytype(val));
+    PyObject* pykey = pytype(key);
+    PyObject* pyval = pytype(val);
+    PyDict_SetItem(dict, pykey, pyval);
+    Py_DECREF(pykey);
+    Py_DECREF(pyval);
 }
 
 static PyObject* pylist() {
@@ -53,29 +62,124 @@ static PyObject* pylist() {
 
 template<typename T>
 static void pylist(PyObject* list, T val) {
-    PyList_Append(list, pytype(val));
+    PyObject* pyval = pytype(val);
+    PyList_Append(list, pyval);
+    Py_DECREF(pyval);
 }
 
+// appends val and steals the reference
 static void pylist(PyObject* list, PyObject* val) {
     PyList_Append(list, val);
+    Py_DECREF(val);
 }
 
+static PyObject* vec_to_list(const std::vector<int>& vec) {
+    PyObject* list = PyList_New(vec.size());
+    if (list == nullptr) return nullptr;
+    for (size_t i = 0; i < vec.size(); i++) {
+        PyList_SET_ITEM(list, i, PyLong_FromLong(vec[i]));
+    }
+    return list;
+}
 
+static PyObject* formula_to_list(const std::vector<std::vector<int>>& formula) {
+    PyObject* list = PyList_New(formula.size());
+    if (list == nullptr) return nullptr;
+    for (size_t i = 0; i < formula.size(); i++) {
+        PyObject* elem = vec_to_list(formula[i]);
+        if (elem == nullptr) {
+            Py_DECREF(list);
+            return nullptr;
+        }
+        PyList_SET_ITEM(list, i, elem);
+    }
+    return list;
+}
+
+
+/**
+ * @brief Integers of a python sequence
+ * @throws std::invalid_argument if list is not a sequence of integers in the range of int
+ */
 static std::vector<int> list_to_vec(PyObject* list) {
+    PyObject* seq = PySequence_Fast(list, "expected a list of integers");
+    if (seq == nullptr) {
+        PyErr_Clear();
+        throw std::invalid_argument("expected a list of integers");
+    }
     std::vector<int> vec;
-    for (Py_ssize_t i = 0; i < PyList_Size(list); i++) {
-        PyObject* elem = PyList_GetItem(list, i);
+    Py_ssize_t size = PySequence_Fast_GET_SIZE(seq);
+    vec.reserve(size);
+    for (Py_ssize_t i = 0; i < size; i++) {
+        PyObject* elem = PySequence_Fast_GET_ITEM(seq, i);
         long lit = PyLong_AsLong(elem);
+        if ((lit == -1 && PyErr_Occurred()) || lit < INT_MIN || lit > INT_MAX) {
+            PyErr_Clear();
+            Py_DECREF(seq);
+            throw std::invalid_argument("expected a list of integers in the range of int");
+        }
         vec.push_back(static_cast<int>(lit));
     }
+    Py_DECREF(seq);
     return vec;
 }
 
+/**
+ * @brief Clauses of a python sequence of sequences of integers
+ * @throws std::invalid_argument if list is malformed
+ */
 static std::vector<std::vector<int>> list_to_formula(PyObject* list) {
+    PyObject* seq = PySequence_Fast(list, "expected a list of clauses");
+    if (seq == nullptr) {
+        PyErr_Clear();
+        throw std::invalid_argument("expected a list of clauses");
+    }
     std::vector<std::vector<int>> formula;
-    for (Py_ssize_t i = 0; i < PyList_Size(list); i++) {
-        PyObject* elem = PyList_GetItem(list, i);
-        formula.push_back(list_to_vec(elem));
+    Py_ssize_t size = PySequence_Fast_GET_SIZE(seq);
+    formula.reserve(size);
+    try {
+        for (Py_ssize_t i = 0; i < size; i++) {
+            formula.push_back(list_to_vec(PySequence_Fast_GET_ITEM(seq, i)));
+        }
+    } catch (std::invalid_argument& e) {
+        Py_DECREF(seq);
+        throw;
+    }
+    Py_DECREF(seq);
+    return formula;
+}
+
+/**
+ * @brief Clauses of a flat buffer of 32-bit integers, each clause terminated by 0 
+ * (e.g. a numpy int32 array in shared memory)
+ * @throws std::invalid_argument if the buffer is not contiguous, not of 32-bit integers or not terminated by 0
+ */
+static std::vector<std::vector<int>> buffer_to_formula(PyObject* obj) {
+    Py_buffer view;
+    if (PyObject_GetBuffer(obj, &view, PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) != 0) {
+        PyErr_Clear();
+        throw std::invalid_argument("expected a contiguous buffer of clauses");
+    }
+    std::string format = view.format != nullptr ? view.format : "B";
+    if (view.itemsize != sizeof(int) || (format != "i" && format != "=i" && format != "<i" && format != "l")) {
+        PyBuffer_Release(&view);
+        throw std::invalid_argument("expected a buffer of 32-bit integers");
+    }
+    const int* lits = static_cast<const int*>(view.buf);
+    Py_ssize_t size = view.len / view.itemsize;
+    std::vector<std::vector<int>> formula;
+    std::vector<int> clause;
+    for (Py_ssize_t i = 0; i < size; i++) {
+        if (lits[i] == 0) {
+            formula.push_back(clause);
+            clause.clear();
+        } else {
+            clause.push_back(lits[i]);
+        }
+    }
+    PyBuffer_Release(&view);
+    if (!clause.empty()) {
+        throw std::invalid_argument("expected clauses terminated by 0");
     }
     return formula;
 }
@@ -92,6 +92,15 @@ static void fileout(int signal) {
 }
 
 
+// leaving a handler by throwing keeps its signal blocked, such that limits would not fire again in reused processes
+static void unblock(int signal) {
+    sigset_t set;
+    sigemptyset(&set);
+    sigaddset(&set, signal);
+    sigprocmask(SIG_UNBLOCK, &set, nullptr);
+}
+
+
 class ResourceLimits {
     unsigned rlim_;  // runtime limit (seconds)
     unsigned mlim_;  // memory limit (mega bytes)
@@ -163,7 +172,8 @@ class ResourceLimits {
 
         if (rlim_ > 0) {
             getrlimit(RLIMIT_CPU, &limit);
-            uint64_t rlim = static_cast<uint64_t>(rlim_);  // seconds
+            // relative to cpu time consumed so far (processes are reused for several calls)
+            uint64_t rlim = static_cast<uint64_t>(time_) + rlim_ + 1;  // seconds
             if (rlim <= limit.rlim_max) {
                 limit.rlim_cur = rlim;
             } else {
@@ -177,6 +187,7 @@ class ResourceLimits {
             cpu_limit = limit;
             cpu_limit.rlim_cur = limit.rlim_max;
             signal(SIGXCPU, timeout);
+            unblock(SIGXCPU);
         }
 
         if (flim_ > 0) {
@@ -195,6 +206,7 @@ class ResourceLimits {
             fsize_limit = limit;
             fsize_limit.rlim_cur = limit.rlim_max;
             signal(SIGXFSZ, fileout);
+            unblock(SIGXFSZ);
         }
 
         #endif
@@ -0,0 +1,173 @@
+/*************************************************************************************************
+Solbert -- Copyright (c) 2022, Markus Iser, KIT - Karlsruhe Institute of Technology
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and
+associated documentation files (the "Software"), to deal in the Software without restriction,
+including without limitation the rights to use, copy, modify, merge, publish, distribute,
+sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT
+NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT
+OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ **************************************************************************************************/
+
+#ifndef SRC_UTIL_SOLVER_H_
+#define SRC_UTIL_SOLVER_H_
+
+#include <vector>
+
+#ifdef SOLBERT_CADICAL
+    #include "cadical.hpp"
+#else
+    #include "lib/ipasir.h"
+#endif
+
+/**
+ * @brief Incremental SAT solver backend, released when it goes out of scope (also if left by an exception)
+ * 
+ * Native CaDiCaL if compiled with SOLBERT_CADICAL, any IPASIR solver otherwise.
+ * Without native support phase() and freeze() are hints without effect 
+ * and the constraint (one clause for the next solve call only) is added as permanent clause.
+ */
+class Solver {
+#ifdef SOLBERT_CADICAL
+    struct Terminator : public CaDiCaL::Terminator {
+        void* data = nullptr;
+        int (*callback)(void*) = nullptr;
+        bool terminate() {
+            return callback != nullptr && callback(data) != 0;
+        }
+    };
+
+    CaDiCaL::Solver solver;
+    Terminator terminator;
+#else
+    void* solver;
+#endif
+
+ public:
+#ifdef SOLBERT_CADICAL
+    Solver() { }
+    ~Solver() { }
+#else
+    Solver() : solver(ipasir_init()) { }
+    ~Solver() { ipasir_release(solver); }
+#endif
+
+    Solver(const Solver&) = delete;
+    Solver& operator=(const Solver&) = delete;
+
+    static bool native() {
+#ifdef SOLBERT_CADICAL
+        return true;
+#else
+        return false;
+#endif
+    }
+
+    static const char* signature() {
+#ifdef SOLBERT_CADICAL
+        return "cadical (native)";
+#else
+        return ipasir_signature();
+#endif
+    }
+
+    void add(int lit) {
+#ifdef SOLBERT_CADICAL
+        solver.add(lit);
+#else
+        ipasir_add(solver, lit);
+#endif
+    }
+
+    void add_clause(const std::vector<int>& clause) {
+        for (int lit : clause) {
+            add(lit);
+        }
+        add(0);
+    }
+
+    void add_formula(const std::vector<std::vector<int>>& formula) {
+        for (const std::vector<int>& clause : formula) {
+            add_clause(clause);
+        }
+    }
+
+    void assume(int lit) {
+#ifdef SOLBERT_CADICAL
+        solver.assume(lit);
+#else
+        ipasir_assume(solver, lit);
+#endif
+    }
+
+    // clause for the next solve call only
+    void constrain(const std::vector<int>& clause) {
+#ifdef SOLBERT_CADICAL
+        for (int lit : clause) {
+            solver.constrain(lit);
+        }
+        solver.constrain(0);
+#else
+        add_clause(clause);
+#endif
+    }
+
+    // preferred value of the variable in decisions
+    void phase(int lit) {
+#ifdef SOLBERT_CADICAL
+        solver.phase(lit);
+#endif
+    }
+
+    // keeps the variable from being eliminated (for variables in later assumptions and clauses)
+    void freeze(int var) {
+#ifdef SOLBERT_CADICAL
+        solver.freeze(var);
+#endif
+    }
+
+    int solve() {
+#ifdef SOLBERT_CADICAL
+        return solver.solve();
+#else
+        return ipasir_solve(solver);
+#endif
+    }
+
+    int val(int lit) {
+#ifdef SOLBERT_CADICAL
+        return solver.val(lit);
+#else
+        return ipasir_val(solver, lit);
+#endif
+    }
+
+    bool failed(int lit) {
+#ifdef SOLBERT_CADICAL
+        return solver.failed(lit);
+#else
+        return ipasir_failed(solver, lit) != 0;
+#endif
+    }
+
+    // callback is called regularly during search, solving is stopped if it returns non-zero
+    void set_terminate(void* data, int (*callback)(void*)) {
+#ifdef SOLBERT_CADICAL
+        terminator.data = data;
+        terminator.callback = callback;
+        solver.connect_terminator(&terminator);
+#else
+        ipasir_set_terminate(solver, data, callback);
+#endif
+    }
+};
+
+#endif  // SRC_UTIL_SOLVER_H_
@@ -0,0 +1,143 @@
+/*************************************************************************************************
+Solbert -- Copyright (c) 2022, Markus Iser, KIT - Karlsruhe Institute of Technology
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and
+associated documentation files (the "Software"), to deal in the Software without restriction,
+including without limitation the rights to use, copy, modify, merge, publish, distribute,
+sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT
+NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT
+OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+ **************************************************************************************************/
+
+#ifndef SRC_UTIL_STREAMBUFFER_H_
+#define SRC_UTIL_STREAMBUFFER_H_
+
+#include <archive.h>
+#include <archive_entry.h>
+
+#include <cctype>
+#include <cstdint>
+#include <exception>
+#include <string>
+
+struct ParserException : public std::exception {
+    std::string msg;
+
+    explicit ParserException(const std::string& what) : msg(what) { }
+
+    const char* what() const throw() {
+        return msg.c_str();
+    }
+};
+
+/**
+ * @brief Chunked reader for plain or compressed (xz, gz, bz2, ...) text files
+ * streams the file through libarchive such that it never resides in memory as a whole
+ */
+class StreamBuffer {
+    struct archive* file;
+    char* buffer;
+    ssize_t pos;
+    ssize_t end;
+
+    static const size_t size = 1 << 16;
+
+    bool refill() {
+        if (pos >= end) {
+            pos = 0;
+            end = archive_read_data(file, buffer, size);
+            if (end < 0) {
+                throw ParserException(archive_error_string(file));
+            }
+        }
+        return pos < end;
+    }
+
+ public:
+    explicit StreamBuffer(const char* filename) : pos(0), end(0) {
+        file = archive_read_new();
+        archive_read_support_filter_all(file);
+        archive_read_support_format_raw(file);
+        archive_read_support_format_empty(file);
+        if (archive_read_open_filename(file, filename, size) != ARCHIVE_OK) {
+            std::string error = std::string("Error opening file ") + filename + ": " + archive_error_string(file);
+            archive_read_free(file);
+            throw ParserException(error);
+        }
+        struct archive_entry* entry;
+        if (archive_read_next_header(file, &entry) != ARCHIVE_OK) {
+            std::string error = std::string("Error reading file ") + filename + ": " + archive_error_string(file);
+            archive_read_free(file);
+            throw ParserException(error);
+        }
+        buffer = new char[size];
+        refill();
+    }
+
+    ~StreamBuffer() {
+        archive_read_free(file);
+        delete[] buffer;
+    }
+
+    StreamBuffer(const StreamBuffer&) = delete;
+    StreamBuffer& operator=(const StreamBuffer&) = delete;
+
+    bool eof() {
+        return !refill();
+    }
+
+    char operator*() {
+        return eof() ? '\0' : buffer[pos];
+    }
+
+    void operator++() {
+        if (!eof()) ++pos;
+    }
+
+    void skipWhitespace() {
+        while (!eof() && isspace(buffer[pos])) ++pos;
+    }
+
+    void skipLine() {
+        while (!eof() && buffer[pos] != '\n') ++pos;
+        ++(*this);
+    }
+
+    bool skipString(const char* str) {
+        for (; *str != '\0'; ++str, ++(*this)) {
+            if (eof() || buffer[pos] != *str) return false;
+        }
+        return true;
+    }
+
+    int readInteger() {
+        skipWhitespace();
+        bool neg = false;
+        if (**this == '-') {
+            neg = true;
+            ++(*this);
+        }
+        if (eof() || !isdigit(buffer[pos])) {
+            throw ParserException(std::string("Unexpected character '") + **this + "', expected integer");
+        }
+        int64_t val = 0;
+        while (!eof() && isdigit(buffer[pos])) {
+            val = val * 10 + (buffer[pos] - '0');
+            if (val > INT32_MAX) {
+                throw ParserException("Integer out of range");
+            }
+            ++pos;
+        }
+        return static_cast<int>(neg ? -val : val);
+    }
+};
+
+#endif  // SRC_UTIL_STREAMBUFFER_H_
@@ -0,0 +1,124 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+
+# CSR occurrence index over a flat clause array (literal -> sorted clause ids),
+# clause removal is tracked in a bitmap
+class OccurrenceIndex:
+
+    def __init__(self, literals: np.ndarray, offsets: np.ndarray, nvars):
+        self.literals = literals
+        self.offsets = offsets.astype(np.int64)
+        self.nvars = nvars
+        self.lengths = np.diff(self.offsets)
+        self.owner = np.repeat(np.arange(len(self.lengths), dtype=np.int64), self.lengths)  # literal -> clause id
+        keys = self.lit2idx(self.literals)
+        self.occ = self.owner[np.argsort(keys, kind="stable")]
+        self.start = np.zeros(2 * (self.nvars + 1) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=2 * (self.nvars + 1)), out=self.start[1:])
+        self.removed = np.zeros(len(self.lengths), dtype=bool)
+
+    @staticmethod
+    def lit2idx(lits):
+        return 2 * np.abs(lits).astype(np.int64) + (lits < 0)
+
+    def n_clauses(self):
+        return len(self.lengths)
+
+    def clause(self, clause_id):
+        return self.literals[self.offsets[clause_id]:self.offsets[clause_id+1]]
+
+    def occurrences(self, lit):
+        idx = 2 * abs(lit) + (lit < 0)
+        return self.occ[self.start[idx]:self.start[idx+1]]
+
+    # ids of clauses containing var (in any polarity)
+    def clauses(self, var):
+        return np.union1d(self.occurrences(var), self.occurrences(-var))
+
+    # variables occurring in clauses containing var
+    def variables(self, var):
+        ids = self.clauses(var)
+        if len(ids) == 0:
+            return ids
+        lits = np.concatenate([ self.clause(i) for i in ids ])
+        return np.unique(np.abs(lits))
+
+    def remove(self, var):
+        self.removed[self.clauses(var)] = True
+
+    def n_remaining(self):
+        return int(self.n_clauses() - np.count_nonzero(self.removed))
+
+    # remaining clauses in DIMACS layout (zero-terminated)
+    def remaining_dimacs(self):
+        n = self.n_clauses()
+        dimacs = np.zeros(len(self.literals) + n, dtype=np.int32)
+        pos = np.arange(len(self.literals), dtype=np.int64) + self.owner
+        dimacs[pos] = self.literals
+        keep = np.empty(len(dimacs), dtype=bool)
+        keep[pos] = ~self.removed[self.owner]
+        keep[self.offsets[1:] + np.arange(n, dtype=np.int64)] = ~self.removed
+        return dimacs[keep]
+
+
+# Buffered DIMACS writer
+class ClauseWriter:
+
+    def __init__(self, out, size=1 << 20):
+        self.out = out
+        self.size = size
+        self.buffer = []
+        self.buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def line(self, text):
+        self.buffer.append(text + "\n")
+        self.buffered = self.buffered + len(text) + 1
+        if self.buffered >= self.size:
+            self.flush()
+
+    def comment(self, text):
+        self.line("c " + text)
+
+    def clause(self, clause):
+        self.line("{} 0".format(" ".join(map(str, clause))))
+
+    # write zero-terminated literals in chunks
+    def dimacs(self, dimacs: np.ndarray, chunk=1 << 18):
+        self.flush()
+        ends = np.flatnonzero(dimacs == 0) + 1
+        begin = 0
+        while begin < len(dimacs):
+            end = ends[min(np.searchsorted(ends, begin + chunk), len(ends) - 1)]
+            # each terminator ends a line (also of empty clauses)
+            text = "".join([ "{} ".format(lit) if lit != 0 else "0\n" for lit in dimacs[begin:end].tolist() ])
+            self.out.write(text if text.endswith("\n") else text + "\n")
+            begin = end
+
+    def flush(self):
+        if len(self.buffer) > 0:
+            self.out.write("".join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+        self.out.flush()
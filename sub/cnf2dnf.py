@@ -17,21 +17,43 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from pysat.formula import CNF
-
 import argparse
 import multiprocessing
 import pebble
-from concurrent.futures import as_completed
 import os
+import sys
 import numpy as np
 
 from solbert import compute_prime_implicants2
+from solbert import clause_store
+
+from clause_index import OccurrenceIndex, ClauseWriter
+from scheduler import EliminationScheduler
+import ranking
+
+
+# clause store, inherited by forked pool workers
+formula = None
 
 
-def print_clauses(clauses):
-    for clause in clauses:
-        print("{} 0".format(" ".join(map(str, clause))))
+def eliminate(clauses, inputs, tlim, mlim, budget):
+    # each prime implicant costs at least one literal in the cnf encoding
+    size = sum(len(formula[i]) for i in clauses)
+    return compute_prime_implicants2(formula, inputs, tlim, mlim, clauses, max(1, int(budget * size)))
+
+
+# cnf encoding of disjunction of prime implicants with one fresh variable per non-unit implicant
+def encode_dnf(prim, nvars):
+    root = []
+    clauses = []
+    for term in prim:
+        if len(term) == 1:
+            root.append(term[0])
+        else:
+            nvars = nvars + 1
+            root.append(nvars)
+            clauses.extend([ [ -nvars, lit ] for lit in term ])
+    return clauses + [ root ], nvars
 
 
 def file_type(path):
@@ -44,85 +66,74 @@ def file_type(path):
 
     
 
-# jeroslaw wang per literal
-def nbest_by_jwl(formula, nvars, n):
-    occp = [ 0, ] * (nvars + 1)
-    occn = [ 0, ] * (nvars + 1)
-    for clause in formula:
-        if len(clause) > 1:
-            for lit in clause:
-                if lit < 0:
-                    occn[abs(lit)] = occn[abs(lit)] + 1.0 / len(clause)
-                else:
-                    occp[abs(lit)] = occp[abs(lit)] + 1.0 / len(clause)
-    occ = [ min(a, b) / max(a, b) if a + b != 0 else 0 for a, b in zip(occp, occn) ]
-    return list(np.argpartition(occ, -n)).reverse()
-
-
 def main():
     parser = argparse.ArgumentParser(description='Replace Subformulas by Prime Implicants')
 
-    parser.add_argument('file', type=file_type, help='DIMACS CNF file to process')
+    parser.add_argument('file', type=file_type, help='DIMACS CNF file to process (plain, xz, gz, bz2)')
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument('-v', '--vars', type=int, nargs='+', help='List of variables to eliminate in given order')
     group.add_argument('-n', '--num', type=int, help='Number of variables to eliminate starting with most frequent variable')
     parser.add_argument('-t', '--tlim', type=int, default=10, help='Time-limit per variable (seconds)')
     parser.add_argument('-m', '--mlim', type=int, default=500, help='Memory-limit per variable (megabyte)')
     parser.add_argument('-j', '--jobs', type=int, default=1, help='Size of process pool')
+    parser.add_argument('-H', '--heuristic', choices=list(ranking.HEURISTICS.keys()), default="occurrence", help='Variable ranking heuristic (used with --num)')
+    parser.add_argument('-b', '--budget', type=float, default=1.0, help='Maximum size (literals) of substitution relative to replaced clauses')
+    parser.add_argument('-w', '--window', type=int, default=0, help='Maximum number of jobs in flight (default: twice the pool size)')
     args = parser.parse_args()
 
-    cnf = CNF(from_file=args.file)
+    global formula
+    formula = clause_store(args.file)
 
-    occc = [ [] for _ in range(cnf.nv+1) ]
-    occv = [ set() for _ in range(cnf.nv+1) ]
-    for clause in cnf.clauses:
-        for lit in clause:
-            occc[abs(lit)].append(clause)
-            occv[abs(lit)].update([ abs(lit) for lit in clause ])
+    index = OccurrenceIndex(np.frombuffer(formula.literals(), dtype=np.int32), np.frombuffer(formula.offsets(), dtype=np.uint64), formula.nvars)
 
-    variables = []
     if args.vars:
         variables = args.vars        
     else:
-        occs = [ 0 for _ in range(cnf.nv+1) ]
-        for clause in cnf.clauses:
-            for lit in clause:
-                occs[abs(lit)] = occs[abs(lit)] + 1.0 / (len(clause)**2)
-        variables = list(np.argsort(occs)[1:])[::-1]
-
-    replaced = []
-    
-    with pebble.ProcessPool(max_workers=min(multiprocessing.cpu_count(), args.jobs), max_tasks=1) as p:
-        futures = { p.schedule(compute_prime_implicants2, (occc[v], list(occv[v]), args.tlim, args.mlim)): v for v in variables }
-        for f in as_completed(list(futures.keys())):
+        variables = ranking.rank(index, args.heuristic)
+
+    eliminated = 0
+    nvars = formula.nvars
+    substitutions = []
+    writer = ClauseWriter(sys.stdout)
+
+    jobs = min(multiprocessing.cpu_count(), args.jobs)
+    window = args.window if args.window > 0 else 2 * jobs
+    context = multiprocessing.get_context("fork")
+    with pebble.ProcessPool(max_workers=jobs, context=context) as p:
+        scheduler = EliminationScheduler(p, index, variables, window, eliminate, (args.tlim, args.mlim, args.budget), timeout=2*args.tlim+1)
+        for v, ids, f in scheduler:
             try:
                 prim = f.result()
-                v = futures[f]
-                if prim == "timeout" or prim == "memout":
-                    print("c skipped elimination of variable {} due to {}".format(v, prim))
+                if prim == "timeout" or prim == "memout" or prim == "sizeout":
+                    writer.comment("skipped elimination of variable {} due to {}".format(v, prim))
+                    scheduler.reject(v, ids)
+                    continue
+                replaced = sum(len(formula[i]) for i in ids)
+                clauses, nvars_sub = encode_dnf(prim, nvars)
+                size = sum(len(clause) for clause in clauses)
+                if size > args.budget * replaced:
+                    writer.comment("skipped elimination of variable {} due to size ({} > {} literals)".format(v, size, replaced))
+                    scheduler.reject(v, ids)
                 else:
-                    print("c found {} prime implicants for {} clauses containing variable {}".format(len(prim), len(occc[v]), v))
-                    dnf = [ "{} 0".format(" ".join(map(str, term))) for term in prim ]
-                    print("DNF {} 0".format(" ".join(dnf)))
-                    replaced.extend([v, -v])
-                    if len(replaced) >= 2*args.num:
-                        break
-            except pebble.ProcessExpired as e:
-                f.cancel()
-                print("{}: {}".format(e.__class__.__name__, e))
+                    writer.comment("replaced {} clauses containing variable {} by {} prime implicants".format(len(ids), v, len(prim)))
+                    substitutions.extend(clauses)
+                    nvars = nvars_sub
+                    scheduler.accept(v, ids)
+                    eliminated = eliminated + 1
+                    if args.num is not None and eliminated >= args.num:
+                        scheduler.stop()
             except Exception as e:
-                f.cancel()
-                print("{}: {}".format(e.__class__.__name__, e))
+                scheduler.reject(v, ids)
+                writer.comment("{}: {}".format(e.__class__.__name__, e))
+        p.stop()
+        p.join()
 
-        for f in futures.keys():
-            f.cancel()
-
-    for clause in cnf.clauses:
-        if not any(lit in clause for lit in replaced):
-            print("{} 0".format(" ".join(map(str, clause))))
-
-    
+    writer.line("p cnf {} {}".format(nvars, len(substitutions) + index.n_remaining()))
+    for clause in substitutions:
+        writer.clause(clause)
+    writer.dimacs(index.remaining_dimacs())
+    writer.flush()
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
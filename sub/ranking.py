@@ -0,0 +1,75 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from clause_index import OccurrenceIndex
+
+
+# Variable scores over the flat clause array (higher is better), all vectorized per literal
+
+# sum of 1/len^2 per occurrence
+def occurrence(index: OccurrenceIndex):
+    weights = 1.0 / index.lengths[index.owner].astype(np.float64) ** 2
+    return np.bincount(np.abs(index.literals), weights=weights, minlength=index.nvars + 1)
+
+
+# two-sided jeroslow-wang: sum of 2^-len per occurrence
+def jeroslow_wang(index: OccurrenceIndex):
+    weights = np.exp2(-index.lengths[index.owner].astype(np.float64))
+    return np.bincount(np.abs(index.literals), weights=weights, minlength=index.nvars + 1)
+
+
+def polarity_weights(index: OccurrenceIndex, weights):
+    pos = index.literals > 0
+    var_ids = np.abs(index.literals)
+    occp = np.bincount(var_ids[pos], weights=weights[pos], minlength=index.nvars + 1)
+    occn = np.bincount(var_ids[~pos], weights=weights[~pos], minlength=index.nvars + 1)
+    return occp, occn
+
+
+# balance of 1/len weighted positive and negative occurrences in non-unit clauses
+def balance(index: OccurrenceIndex):
+    lengths = index.lengths[index.owner].astype(np.float64)
+    weights = np.where(lengths > 1, 1.0 / lengths, 0.0)
+    occp, occn = polarity_weights(index, weights)
+    high = np.maximum(occp, occn)
+    return np.divide(np.minimum(occp, occn), high, out=np.zeros_like(high), where=high > 0)
+
+
+# small occurrence subformulas (number of literals in clauses containing the variable) first
+def subformula(index: OccurrenceIndex):
+    sizes = np.bincount(np.abs(index.literals), weights=index.lengths[index.owner], minlength=index.nvars + 1)
+    return -sizes
+
+
+# small estimated prime implicant blow-up first, estimated by the growth of the formula under resolution
+def blowup(index: OccurrenceIndex):
+    occp, occn = polarity_weights(index, np.ones(len(index.literals)))
+    return -(occp * occn - occp - occn)
+
+
+HEURISTICS = { "occurrence": occurrence, "jw": jeroslow_wang, "balance": balance, "subformula": subformula, "blowup": blowup }
+
+
+# occurring variables, best first
+def rank(index: OccurrenceIndex, heuristic="occurrence"):
+    scores = HEURISTICS[heuristic](index)
+    occurs = np.bincount(np.abs(index.literals), minlength=index.nvars + 1) > 0
+    occurs[0] = False
+    variables = np.flatnonzero(occurs)
+    order = np.argsort(-scores[variables], kind="stable")
+    return variables[order]
@@ -0,0 +1,91 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from concurrent.futures import wait, FIRST_COMPLETED
+
+import numpy as np
+
+from clause_index import OccurrenceIndex
+
+
+# Schedules elimination jobs in priority order with a bounded number of jobs in flight,
+# such that no two scheduled or accepted eliminations share a clause
+class EliminationScheduler:
+
+    def __init__(self, pool, index: OccurrenceIndex, candidates, window, task, args=(), timeout=None):
+        self.pool = pool
+        self.index = index
+        self.candidates = iter(candidates)
+        self.window = window
+        self.task = task
+        self.args = args
+        self.timeout = timeout
+        self.reserved = np.zeros(index.n_clauses(), dtype=bool)  # clauses of running or accepted jobs
+        self.deferred = []  # candidates which overlap running jobs only
+        self.running = dict()  # future -> (var, clause ids)
+        self.stopped = False
+
+    def __iter__(self):
+        while not self.stopped:
+            self.fill()
+            if len(self.running) == 0:
+                return
+            done, _ = wait(list(self.running.keys()), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in self.running:
+                    var, ids = self.running.pop(future)
+                    yield var, ids, future
+
+    def fill(self):
+        # first retry deferred candidates (they have higher priority)
+        deferred = self.deferred
+        self.deferred = []
+        for var in deferred:
+            if len(self.running) >= self.window:
+                self.deferred.append(var)
+            else:
+                self.submit(var)
+        # stop pulling once as many candidates wait as fit into the window (each completion rescans them)
+        while len(self.running) < self.window and len(self.deferred) < self.window:
+            var = next(self.candidates, None)
+            if var is None:
+                return
+            self.submit(var)
+
+    def submit(self, var):
+        ids = self.index.clauses(var)
+        if len(ids) == 0 or self.index.removed[ids].any():
+            return  # nothing to eliminate or conflicts with accepted elimination
+        if self.reserved[ids].any():
+            self.deferred.append(var)
+            return
+        self.reserved[ids] = True
+        inputs = self.index.variables(var).tolist()
+        future = self.pool.schedule(self.task, (ids.tolist(), inputs) + tuple(self.args), timeout=self.timeout)
+        self.running[future] = (var, ids)
+
+    def accept(self, var, ids):
+        self.index.removed[ids] = True
+
+    def reject(self, var, ids):
+        self.reserved[ids] = False
+
+    def stop(self):
+        self.stopped = True
+        for future in self.running.keys():
+            future.cancel()
+        self.running.clear()
+        self.deferred = []
@@ -14,11 +14,72 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
 import numpy as np
+from functools import partial
 
 from tree_wrapper import DecisionTreeWrapper
+from tree_implicants import TreeImplicants
+from interval_encoding import ENCODINGS
 
 from solbert import compute_prime_implicants
+from solbert import compute_shortest_prime_implicants
+from solbert import solver
+
+
+def checkpoint_file(checkpoint, class_id):
+    if checkpoint is None:
+        return None
+    os.makedirs(checkpoint, exist_ok=True)
+    return os.path.join(checkpoint, "class{}.pis".format(class_id))
+
+
+# value ranges (lower, upper] of the runs of enabled intervals (indices in ascending order) given the split values
+def interval_ranges(values, enabled):
+    ranges = []
+    for j, i in enumerate(enabled):
+        if j == 0 or enabled[j-1] != i - 1:
+            ranges.append([ values[i-1] if i > 0 else -np.inf, values[i] ])
+        else:
+            ranges[-1][1] = values[i]
+    return [ (lower, upper) for lower, upper in ranges ]
+
+
+def format_value(value):
+    return "{:7f}".format(value).rstrip('0').rstrip('.')
+
+# query of value ranges per feature (see bounds): the bounds of a single range are conjoined, 
+# the ranges of a feature with gaps are disjoined; cases: number of bounds
+def decode_bounds(bounds):
+    query = []
+    ncases = 0
+    for feat, ranges in bounds.items():
+        terms = []
+        for lower, upper in ranges:
+            conditions = []
+            if np.isfinite(lower):
+                conditions.append("{} > {}".format(feat, format_value(lower)))
+            if np.isfinite(upper):
+                conditions.append("{} <= {}".format(feat, format_value(upper)))
+            ncases = ncases + len(conditions)
+            terms.append(conditions)
+        if len(terms) == 1:
+            query.extend(terms[0])
+        else:
+            query.append("(" + " or ".join([ "(" + " and ".join(c) + ")" if len(c) > 1 else c[0] for c in terms ]) + ")")
+    result = { "features": len(bounds), "cases": ncases }
+    if len(query) > 10:
+        split = int(len(query)/2)
+        query1 = " and ".join(query[:split])
+        query2 = " and ".join(query[split:])
+        result["query"] = "(" + query1 + ") and (" + query2 + ")"
+    else:
+        result["query"] = " and ".join(query)
+    return result
+
+
+class CrossCheckFailed(Exception):
+    pass
 
 
 class VariableProducer:
@@ -32,9 +93,10 @@ class VariableProducer:
 
 class DecisionTreeEncoder:
 
-    def __init__(self, tree: DecisionTreeWrapper, vprod: VariableProducer = None):
+    def __init__(self, tree: DecisionTreeWrapper, vprod: VariableProducer = None, encoding="direct"):
         self.dtw = tree
         self.vprod = vprod if vprod != None else VariableProducer()
+        self.encoding = encoding
         self.vars = 0
         # class variables:
         self.vclasses = [ self.new_var() for _ in range(self.dtw.n_classes()) ]
@@ -79,14 +141,71 @@ class DecisionTreeEncoder:
         assert False, "variable {} not found".format(var_id)
 
 
-    def explain(self):
+    # k > 0 or max_size > 0: enumerate only the k shortest prime implicants up to max_size
+    # checkpoint: directory for resumable per-class enumerations
+    # progress: called with the class and a dict of found, solves and seconds (see solbert), cancel: token such as threading.Event, 
+    # a cancelled enumeration returns the prime implicants found so far, remaining classes are skipped
+    # engine "sat": prime implicants of the encoding, which for a single tree are the boxes of the leafs of each class
+    # engine "boxes": maximal boxes in the union of leafs of each class (no SAT solving, no progress reports, cancel between classes), 
+    # so the two engines return different prime implicants (each leaf box lies within some maximal box)
+    def explain(self, k=0, max_size=0, checkpoint=None, engine="sat", progress=None, cancel=None):
+        if engine == "boxes":
+            return self.explain_boxes(k, max_size, cancel)
         implicants = dict()
         for cat in self.dtw.class_names:
+            if cancel is not None and cancel.is_set():
+                break
             target = self.encode_target_classes([cat])
-            implicants[cat] = compute_prime_implicants(self.clauses + target, self.vintervall)
+            report = partial(progress, cat) if progress is not None else None
+            if k > 0 or max_size > 0:
+                implicants[cat] = compute_shortest_prime_implicants(self.clauses + target, self.vintervall, 0, 0, k, max_size, progress=report, cancel=cancel)
+            else:
+                path = checkpoint_file(checkpoint, self.dtw.class_id(cat))
+                implicants[cat] = compute_prime_implicants(self.clauses + target, self.vintervall, 0, 0, path, progress=report, cancel=cancel)
+                implicants[cat].sort(key=len)
+        return implicants
+
+
+    def explain_boxes(self, k=0, max_size=0, cancel=None):
+        engine = TreeImplicants(self.dtw)
+        implicants = dict()
+        for cat in self.dtw.class_names:
+            if cancel is not None and cancel.is_set():
+                break
+            lo, hi = engine.prime_boxes(cat)
+            implicants[cat] = [ self.box2implicant(blo, bhi) for blo, bhi in zip(lo, hi) ]
             implicants[cat].sort(key=len)
+            if max_size > 0:
+                implicants[cat] = [ imp for imp in implicants[cat] if len(imp) <= max_size ]
+            if k > 0:
+                implicants[cat] = implicants[cat][:k]
         return implicants
 
+    # cross-check of the maximal boxes of engine "boxes" with the SAT path: the leaf boxes found by the SAT path 
+    # must lie within the maximal boxes and no leaf of another class may intersect a maximal box
+    def cross_check(self, implicants):
+        values = [ [ -v for v in vars ] for vars in self.vintervals if len(vars) > 0 ]
+        for cat in self.dtw.class_names:
+            target = self.encode_target_classes([cat])
+            boxes = [ set(imp) for imp in implicants[cat] ]
+            for imp in compute_prime_implicants(self.clauses + target, self.vintervall):
+                if not any(box <= set(imp) for box in boxes):
+                    raise CrossCheckFailed("leaf box {} of class {} not within a maximal box".format(imp, cat))
+            others = self.encode_target_classes([ other for other in self.dtw.class_names if other != cat ])
+            sat = solver(self.clauses + values + others)
+            for imp in implicants[cat]:
+                if sat.solve([ -lit for lit in imp ]):
+                    raise CrossCheckFailed("maximal box {} of class {} intersects another class".format(imp, cat))
+
+    # disabled intervals outside of the box
+    def box2implicant(self, lo, hi):
+        implicant = []
+        for feat_id in range(self.dtw.n_features()):
+            for i, v in enumerate(self.vintervals[feat_id]):
+                if i < lo[feat_id] or i >= hi[feat_id]:
+                    implicant.append(-v)
+        return implicant
+
 
     def encode_target_classes(self, targetclasses):
         target = [ self.class2var(self.dtw.class_id(name)) for name in targetclasses ]
@@ -94,30 +213,17 @@ class DecisionTreeEncoder:
 
 
     def decode(self, implicant):
-        query = []
-        nfeats = 0
-        ncases = 0
+        return decode_bounds(self.bounds(implicant))
+
+
+    # value ranges [ (lower, upper], ... ] of the features constrained by the implicant
+    def bounds(self, implicant):
+        disabled = set(implicant)
+        result = dict()
         for feat_id in range(self.dtw.n_features()):
-            feat = self.dtw.feature_name(feat_id)
-            prev = ncases
-            for i in range(len(self.vintervals[feat_id])-1):
-                m0 = -self.vintervals[feat_id][i] in implicant
-                m1 = -self.vintervals[feat_id][i+1] in implicant
-                if m0 != m1:
-                    ncases = ncases + 1
-                    thre = self.dtw.feature_value(feat_id, i)
-                    form = "{:7f}".format(thre).rstrip('0').rstrip('.')
-                    query.append("{} {} {}".format(feat, ">" if m0 else "<=", form))
-            if prev != ncases:
-                nfeats = nfeats + 1
-        result = { "features": nfeats, "cases": ncases }
-        if len(query) > 10:
-            split = int(len(query)/2)
-            query1 = " and ".join(query[:split])
-            query2 = " and ".join(query[split:])
-            result["query"] = "(" + query1 + ") and (" + query2 + ")"
-        else:
-            result["query"] = " and ".join(query)
+            enabled = [ i for i, v in enumerate(self.vintervals[feat_id]) if -v not in disabled ]
+            if 0 < len(enabled) < len(self.vintervals[feat_id]):
+                result[self.dtw.feature_name(feat_id)] = interval_ranges(self.dtw.feature_values(feat_id), enabled)
         return result
 
 
@@ -154,19 +260,21 @@ class DecisionTreeEncoder:
 
     # node disables values
     def encode_value_constraints(self):
-        clauses = []
+        self.encodings = [ ENCODINGS[self.encoding](self.new_var, vintervals) for vintervals in self.vintervals ]
         for node in range(self.dtw.n_nodes()):
             if self.dtw.is_inner_node(node):
                 feat = self.dtw.node_feature(node)
                 thre = self.dtw.node_threshold(node)
                 split = 1+self.dtw.feature_values(feat).index(thre)
-                vleft = self.vintervals[feat][:split]
-                vright = self.vintervals[feat][split:]
-                for v in vleft: # false disables left values:
-                    clauses.append([ -self.node2var(node, False), v ])
-                for v in vright: # true disables right values:
-                    clauses.append([ -self.node2var(node, True), v ])
-        return clauses
+                # false disables left values, true disables right values:
+                self.encodings[feat].disable_below(self.node2var(node, False), split)
+                self.encodings[feat].disable_above(self.node2var(node, True), split)
+        return [ clause for encoding in self.encodings for clause in encoding.clauses ]
+
+
+    def stats(self):
+        return { "encoding": self.encoding, "vars": self.vprod.vars, "clauses": len(self.clauses), 
+            "value_vars": sum(enc.nvars for enc in self.encodings), "value_clauses": sum(len(enc.clauses) for enc in self.encodings) }
 
 
     def print(self, model, ranges=True, nodes=False, classes=False):
@@ -17,34 +17,33 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import numpy as np
-import pandas as pd
-from sklearn import tree, ensemble
-from sklearn.metrics import accuracy_score
-from sklearn.model_selection import train_test_split
-
 from gbd_tool.gbd_api import GBD
 from gbd_tool.util import eprint
 
 from tree_encoder import DecisionTreeEncoder
 from tree_wrapper import DecisionTreeWrapper
 
-from matplotlib import pyplot as plt
+from pi_index import ImplicantIndex
+from report import Reporter
 
 
 class DecisionTreeExplainer:
 
-    def __init__(self, query, api: GBD, wrapper: DecisionTreeWrapper):
+    # cross_check: verify the prime implicants of engine "boxes" with the SAT path (raises CrossCheckFailed)
+    def __init__(self, query, api: GBD, wrapper: DecisionTreeWrapper, k=0, max_size=0, checkpoint=None, engine="sat", encoding="direct", cross_check=False):
         self.query = query
         self.api = api
         self.wrapper = wrapper
-        self.encoder = DecisionTreeEncoder(wrapper)
+        self.encoder = DecisionTreeEncoder(wrapper, encoding=encoding)
         self.cats = self.wrapper.class_names
-        self.implicants = self.encoder.explain()
+        self.implicants = self.encoder.explain(k, max_size, checkpoint, engine)
+        if cross_check and engine == "boxes" and k == 0 and max_size == 0:
+            self.encoder.cross_check(self.implicants)
         self.nleafs = dict() # category -> n leafs
         self.nprime = dict() # category -> n prime implicants
         self.depths = dict() # category -> [depths]
         self.nsplits = dict() # category -> [nsplits by prime implicants]
+        self.pi_sizes = dict() # category -> [sizes of prime implicants]
         self.nsamples_leafs = dict() # category -> [samples per leaf]
         self.queries = dict() # category -> queries from prime implicants
         self.nsamples_prime = dict() # category -> [samples per prime implicant]
@@ -56,46 +55,44 @@ class DecisionTreeExplainer:
             self.nprime[cat] = len(implicants)
             self.depths[cat] = sorted([ self.wrapper.node_depth(leaf) for leaf in leafs ])
             self.nsplits[cat] = sorted([self.encoder.decode(imp)["cases"] for imp in implicants])
+            self.pi_sizes[cat] = sorted([self.encoder.decode(imp)["features"] for imp in implicants])
             self.nsamples_leafs[cat] = sorted([self.wrapper.node_samples_total(leaf) for leaf in leafs])
             self.queries[cat] = [ self.encoder.decode(imp)["query"] for imp in implicants ]
             self.nsamples_prime[cat] = sorted([len(self.api.query_search(self.query + " and " + query)) for query in self.queries[cat]])
 
-    def report(self):
-        self.report_depth_vs_size()
-        #self.report_numbers_of_samples()
-        self.report_queries()
+    # lookup index of the prime implicants for new instances (see ImplicantIndex.save)
+    def index(self):
+        return ImplicantIndex.build(self.encoder, self.implicants)
 
-    def report_depth_vs_size(self):
-        fig, ax = plt.subplots()
-        ax.set_xlabel("Leaf or PI")
-        ax.set_ylabel("Leaf Depth / PI Size")
+    def report(self, reporter: Reporter = None):
+        reporter = reporter if reporter is not None else Reporter()
+        self.report_depth_vs_size(reporter)
+        #self.report_numbers_of_samples(reporter)
+        self.report_queries(reporter)
+
+    def report_depth_vs_size(self, reporter: Reporter):
         for cat in self.cats:
-            plt.title(cat)
-            plt.plot(self.depths[cat], label="Leaf Depths")
-            plt.plot(self.nsplits[cat], label="PI Splits")
-            plt.legend()
-            plt.show()
+            series = [ ("Leaf Depths", self.depths[cat]), ("PI Splits", self.nsplits[cat]) ]
+            reporter.plot("depth_vs_size_{}".format(cat), cat, "Leaf or PI", "Leaf Depth / PI Size", series, legend="best")
 
-    def report_numbers_of_samples(self):
-        fig, ax = plt.subplots()
-        ax.set_xlabel("Leaf or PI")
-        ax.set_ylabel("Numbers of Samples")
+    def report_numbers_of_samples(self, reporter: Reporter):
         for cat in self.cats:
-            plt.title(cat)
-            plt.plot(self.nsamples_leafs[cat])
-            plt.plot(self.nsamples_prime[cat])
-            plt.legend(loc="upper left")
-            plt.show()
+            series = [ ("Leafs", self.nsamples_leafs[cat]), ("PIs", self.nsamples_prime[cat]) ]
+            reporter.plot("numbers_of_samples_{}".format(cat), cat, "Leaf or PI", "Numbers of Samples", series)
 
-    def report_queries(self):
+    def report_queries(self, reporter: Reporter):
+        lines = []
         for cat in self.cats:
-            print("PI Queries for", cat)
-            print("\n".join(self.queries[cat]))
+            lines.append("PI Queries for {}".format(cat))
+            lines.extend(self.queries[cat])
+        reporter.text("queries", lines)
 
 
 
     def plot(self, leaf_data, imp_data):
+        import pandas as pd
         from statistics import mean
+        from matplotlib import pyplot as plt
         sizes = []
         ncd_ratios = []
         for i in range(len(self.cats)):
@@ -0,0 +1,106 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from tree_wrapper import DecisionTreeWrapper
+
+
+# Prime implicants of a single decision tree without SAT solving:
+# the region of a class is the union of its leaf boxes on the interval lattice, 
+# its prime implicants are the maximal boxes within that union (iterated consensus and absorption)
+class TreeImplicants:
+
+    def __init__(self, tree: DecisionTreeWrapper, chunk=1<<22):
+        self.dtw = tree
+        self.chunk = chunk
+
+    def prime_boxes(self, class_name):
+        lo, hi = self.dtw.leaf_boxes(class_name)
+        full = np.array([ len(self.dtw.feature_values(feat)) for feat in range(self.dtw.n_features()) ], dtype=lo.dtype)
+        # features which are unconstrained in all leafs stay unconstrained in all consensus boxes
+        active = np.any(lo > 0, axis=0) | np.any(hi < full, axis=0)
+        dtype = np.int16 if full.max(initial=0) < np.iinfo(np.int16).max else lo.dtype
+        plo, phi = self.consensus(lo[:, active].astype(dtype), hi[:, active].astype(dtype))
+        lo = np.zeros((len(plo), len(full)), dtype=full.dtype)
+        hi = np.repeat(full[np.newaxis, :], len(phi), axis=0)
+        lo[:, active] = plo
+        hi[:, active] = phi
+        return lo, hi
+
+
+    # mask of boxes (clo, chi) contained in any of the boxes (lo, hi), excluding themselves if exclusive
+    def covered(self, clo, chi, lo, hi, exclusive=False):
+        result = np.zeros(len(clo), dtype=bool)
+        if len(lo) == 0:
+            return result
+        step = max(1, self.chunk // (len(lo) * max(1, lo.shape[1])))
+        for start in range(0, len(clo), step):
+            end = min(start + step, len(clo))
+            inside = np.all((lo[np.newaxis, :, :] <= clo[start:end, np.newaxis, :]) & (chi[start:end, np.newaxis, :] <= hi[np.newaxis, :, :]), axis=2)
+            if exclusive:
+                # equal boxes: only the first one survives
+                equal = np.all((lo[np.newaxis, :, :] == clo[start:end, np.newaxis, :]) & (chi[start:end, np.newaxis, :] == hi[np.newaxis, :, :]), axis=2)
+                later = np.arange(len(lo))[np.newaxis, :] >= np.arange(start, end)[:, np.newaxis]
+                inside = inside & ~(equal & later)
+            result[start:end] = np.any(inside, axis=1)
+        return result
+
+    def absorb(self, lo, hi):
+        keep = ~self.covered(lo, hi, lo, hi, exclusive=True)
+        return lo[keep], hi[keep]
+
+
+    # all consensus boxes of box (alo, ahi) with the boxes (lo, hi):
+    # the intervals of feature f are merged if they overlap or touch, all other features are intersected,
+    # merges where one interval contains the other give boxes within one of the parents and are skipped
+    def resolve(self, alo, ahi, lo, hi):
+        ilo = np.maximum(alo, lo)
+        ihi = np.minimum(ahi, hi)
+        empty = ilo >= ihi
+        nempty = np.sum(empty, axis=1)
+        extends = ((lo < alo) & (hi < ahi)) | ((alo < lo) & (ahi < hi))
+        rlo, rhi = [], []
+        for feat in range(lo.shape[1]):
+            valid = extends[:, feat] & (ilo[:, feat] <= ihi[:, feat]) & (nempty - empty[:, feat] == 0)
+            if np.any(valid):
+                clo = ilo[valid]
+                chi = ihi[valid]
+                clo[:, feat] = np.minimum(alo[feat], lo[valid, feat])
+                chi[:, feat] = np.maximum(ahi[feat], hi[valid, feat])
+                rlo.append(clo)
+                rhi.append(chi)
+        if len(rlo) == 0:
+            return np.empty((0, lo.shape[1]), dtype=lo.dtype), np.empty((0, lo.shape[1]), dtype=hi.dtype)
+        return np.concatenate(rlo), np.concatenate(rhi)
+
+    # consensus is only formed between new boxes and all boxes, pairs of old boxes were resolved before
+    def consensus(self, lo, hi):
+        lo, hi = self.absorb(lo, hi)
+        nlo, nhi = lo, hi
+        while len(nlo) > 0:
+            candidates = [ self.resolve(alo, ahi, lo, hi) for alo, ahi in zip(nlo, nhi) ]
+            clo = np.concatenate([ c[0] for c in candidates ])
+            chi = np.concatenate([ c[1] for c in candidates ])
+            unique = np.unique(np.concatenate((clo, chi), axis=1), axis=0)
+            clo, chi = unique[:, :lo.shape[1]], unique[:, lo.shape[1]:]
+            fresh = ~self.covered(clo, chi, lo, hi)
+            clo, chi = self.absorb(clo[fresh], chi[fresh])
+            keep = ~self.covered(lo, hi, clo, chi)
+            lo = np.concatenate((lo[keep], clo))
+            hi = np.concatenate((hi[keep], chi))
+            nlo, nhi = clo, chi
+        return lo, hi
@@ -16,14 +16,27 @@
 
 import numpy as np
 import pandas as pd
-from sklearn import tree
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from sklearn import tree
 
 class DecisionTreeWrapper:
 
-    def __init__(self, clf: tree.DecisionTreeClassifier, lhs: pd.DataFrame, rhs: pd.Categorical):
+    # collapse: None, "class" (subtrees whose leafs predict the same class become leafs) 
+    # or "distribution" (subtrees whose leafs have identical class distributions become leafs)
+    def __init__(self, clf: "tree.DecisionTreeClassifier", lhs: pd.DataFrame, rhs: pd.Categorical, collapse=None):
         self.clf = clf
         self.feature_names = list(lhs)
         self.class_names = list(rhs.cat.categories)
+        self.children_left = clf.tree_.children_left
+        self.children_right = clf.tree_.children_right
+        self.features = clf.tree_.feature
+        self.thresholds = clf.tree_.threshold
+        self.values = clf.tree_.value
+        self.classes = np.argmax(self.values[:, 0, :], axis=1)
+        if collapse is not None:
+            self.collapse(collapse)
         self.depths = [ 0 ] * self.n_nodes()
         # calc depths:
         stack = [ 0 ]
@@ -34,15 +47,54 @@ class DecisionTreeWrapper:
             if left != right:  # inner node
                 self.depths[left] = self.depths[right] = self.depths[node] + 1
                 stack.extend((left, right))
-        # calc values:
-        self.feature_splits = [ [ np.infty, ] for _ in range(self.n_features()) ]
+        # calc values (features without splits get no intervals):
+        self.feature_splits = [ set() for _ in range(self.n_features()) ]
         for node in range(self.n_nodes()):
             if self.is_inner_node(node):
                 feat = self.node_feature(node)
                 thre = self.node_threshold(node)
-                self.feature_splits[feat].append(thre)
-        for values in self.feature_splits:
-            values.sort()
+                self.feature_splits[feat].add(thre)
+        self.feature_splits = [ sorted(values) + [ np.inf ] if len(values) > 0 else [] for values in self.feature_splits ]
+
+    # replaces subtrees with uniform leafs by leafs and renumbers the remaining nodes in preorder;
+    # thresholds used only inside collapsed subtrees disappear with them, this changes the leaf boxes (and so the 
+    # prime implicants) reported by the SAT path, thresholds are not merged otherwise (no PI-preserving merge)
+    def collapse(self, mode):
+        signature = [ None ] * self.n_nodes()
+        uniform = [ False ] * self.n_nodes()
+        order = [ 0 ]
+        for node in order:
+            if self.is_inner_node(node):
+                order.extend((self.left_child(node), self.right_child(node)))
+        for node in reversed(order):
+            if not self.is_inner_node(node):
+                if mode == "class":
+                    signature[node] = self.classes[node]
+                else:
+                    dist = self.values[node, 0, :]
+                    signature[node] = tuple(dist / dist.sum())
+                uniform[node] = True
+            else:
+                left, right = self.left_child(node), self.right_child(node)
+                if uniform[left] and uniform[right] and signature[left] == signature[right]:
+                    signature[node] = signature[left]
+                    uniform[node] = True
+        keep = []
+        stack = [ 0 ]
+        while len(stack) > 0:
+            node = stack.pop()
+            keep.append(node)
+            if self.is_inner_node(node) and not uniform[node]:
+                stack.extend((self.right_child(node), self.left_child(node)))
+        index = { node: i for i, node in enumerate(keep) }
+        leaf = np.array([ uniform[node] or not self.is_inner_node(node) for node in keep ])
+        self.children_left = np.array([ -1 if leaf[i] else index[self.left_child(node)] for i, node in enumerate(keep) ])
+        self.children_right = np.array([ -1 if leaf[i] else index[self.right_child(node)] for i, node in enumerate(keep) ])
+        self.features = np.where(leaf, -2, self.features[keep])
+        self.thresholds = np.where(leaf, -2.0, self.thresholds[keep])
+        self.values = self.values[keep]
+        # a collapsed node takes the class of its leafs (argmax of the merged distribution may break ties differently)
+        self.classes = np.array([ signature[node] if uniform[node] and mode == "class" else self.classes[node] for node in keep ])
 
     def leaf_nodes(self, class_name):
         nodes = []
@@ -52,6 +104,26 @@ class DecisionTreeWrapper:
                 nodes.append(node)
         return nodes
 
+    # boxes of the leafs as arrays of interval bounds: leaf i covers intervals [lo[i,f], hi[i,f]) of each feature f
+    def leaf_boxes(self, class_name):
+        lo = np.zeros((self.n_nodes(), self.n_features()), dtype=np.int32)
+        hi = np.array([ len(values) for values in self.feature_splits ], dtype=np.int32)[np.newaxis, :].repeat(self.n_nodes(), axis=0)
+        stack = [ 0 ]
+        while len(stack) > 0:
+            node = stack.pop()
+            if self.is_inner_node(node):
+                feat = self.node_feature(node)
+                split = 1+self.feature_values(feat).index(self.node_threshold(node))
+                left = self.left_child(node)
+                right = self.right_child(node)
+                lo[left], hi[left] = lo[node], hi[node]
+                lo[right], hi[right] = lo[node], hi[node]
+                hi[left, feat] = min(hi[node, feat], split)
+                lo[right, feat] = max(lo[node, feat], split)
+                stack.extend((left, right))
+        leafs = self.leaf_nodes(class_name)
+        return lo[leafs], hi[leafs]
+
     def feature_name(self, feat_id):
         return self.feature_names[feat_id]
 
@@ -71,7 +143,7 @@ class DecisionTreeWrapper:
         return self.class_names.index(class_name)
 
     def n_nodes(self):
-        return self.clf.tree_.node_count
+        return len(self.children_left)
 
     def n_leafs(self):
         leafs = [ n for n in range(self.n_nodes()) if not self.is_inner_node(n) ]
@@ -87,31 +159,31 @@ class DecisionTreeWrapper:
         return self.depths[node_id]
 
     def left_child(self, node_id):
-        return self.clf.tree_.children_left[node_id]
+        return self.children_left[node_id]
 
     def right_child(self, node_id):
-        return self.clf.tree_.children_right[node_id]
+        return self.children_right[node_id]
 
     def is_inner_node(self, node_id):
         return self.left_child(node_id) != self.right_child(node_id)
 
     def node_feature(self, node_id):
-        return self.clf.tree_.feature[node_id]
+        return self.features[node_id]
 
     def node_threshold(self, node_id):
-        return self.clf.tree_.threshold[node_id]
+        return self.thresholds[node_id]
 
     def node_samples_total(self, node_id):
         return sum(self.node_samples_per_class(node_id))
 
     def node_samples_per_class(self, node_id):
-        return list(self.clf.tree_.value[node_id][0])
+        return list(self.values[node_id][0])
 
     def node_samples(self, node_id):
         return max(self.node_samples_per_class(node_id))
 
     def node_class(self, node_id):
-        return np.argmax(self.node_samples_per_class(node_id))
+        return self.classes[node_id]
 
     def node_feature_name(self, node_id):
         return self.feature_name(self.node_feature(node_id))
@@ -0,0 +1,162 @@
+# Determine Prime Implicants of Random Forest Classifiers
+# Copyright (C) 2022 Markus Iser, Karlsruhe Institute of Technology (KIT)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import multiprocessing
+from functools import partial
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+from solbert import compute_prime_implicants
+from solbert import compute_shortest_prime_implicants
+
+
+# clauses as flat int32 array, each clause terminated by 0
+def flatten(clauses):
+    lits = np.zeros(sum(len(clause) + 1 for clause in clauses), dtype=np.int32)
+    pos = 0
+    for clause in clauses:
+        lits[pos:pos+len(clause)] = clause
+        pos = pos + len(clause) + 1
+    return lits
+
+
+# workers attach to the base clauses by name, only the target clauses are pickled per task,
+# tasks starting after cancellation are skipped
+def run_shared(name, size, function, target, *args, **kwargs):
+    if kwargs.get("cancel") is not None and kwargs["cancel"].is_set():
+        return []
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        base = np.ndarray((size,), dtype=np.int32, buffer=shm.buf)
+        result = function((base, target), *args, **kwargs)
+        del base
+        return result
+    finally:
+        shm.close()
+
+# progress reports of a worker go to the parent through a manager queue, tagged with the key of the task
+def forward(queue, key, stats):
+    queue.put((key, stats))
+
+def reporter(queue, key):
+    return partial(forward, queue, key) if queue is not None else None
+
+def shared_prime_implicants(name, size, target, inputs, rlim=0, mlim=0, path=None, queue=None, key=None, cancel=None):
+    return run_shared(name, size, compute_prime_implicants, target, inputs, rlim, mlim, path, progress=reporter(queue, key), cancel=cancel)
+
+def shared_shortest_prime_implicants(name, size, target, inputs, rlim=0, mlim=0, k=0, max_size=0, queue=None, key=None, cancel=None):
+    return run_shared(name, size, compute_shortest_prime_implicants, target, inputs, rlim, mlim, k, max_size, progress=reporter(queue, key), cancel=cancel)
+
+
+# Base clauses placed once in shared memory
+class SharedClauses:
+
+    def __init__(self, clauses):
+        lits = flatten(clauses)
+        self.size = len(lits)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, lits.nbytes))
+        np.ndarray(lits.shape, dtype=np.int32, buffer=self.shm.buf)[:] = lits
+        self.name = self.shm.name
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+# Explicitly managed process pool shared by several encoders:
+#   with WorkerPool(8) as pool: 
+#       encoder1.explain_parallel(pool=pool); encoder2.explain_parallel(pool=pool)
+# Progress queues and cancel tokens of the workers are proxies of a manager process started on first use
+class WorkerPool:
+
+    def __init__(self, processes=4):
+        self.processes = processes
+        # workers attaching to shared memory register it with the tracker of the parent instead of their own
+        resource_tracker.ensure_running()
+        self.pool = multiprocessing.Pool(processes=processes)
+        self.manager = None
+        self.shared = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        if self.manager is not None:
+            self.manager.shutdown()
+            self.manager = None
+        for clauses in self.shared:
+            clauses.close()
+        self.shared = []
+
+    def share(self, clauses):
+        shared = SharedClauses(clauses)
+        self.shared.append(shared)
+        return shared
+
+    def release(self, shared: SharedClauses):
+        shared.close()
+        self.shared.remove(shared)
+
+    def managed(self):
+        if self.manager is None:
+            self.manager = multiprocessing.Manager()
+        return self.manager
+
+    # cancel token which can be passed to workers
+    def event(self):
+        return self.managed().Event()
+
+    # queue for progress reports of workers
+    def queue(self):
+        return self.managed().Queue()
+
+    # queue, key: progress reports (key, stats) go to the queue, cancel: token of event()
+    def prime_implicants(self, shared: SharedClauses, target, inputs, path=None, queue=None, key=None, cancel=None):
+        return self.pool.apply_async(shared_prime_implicants, (shared.name, shared.size, target, inputs, 0, 0, path, queue, key, cancel))
+
+    def shortest_prime_implicants(self, shared: SharedClauses, target, inputs, k=0, max_size=0, queue=None, key=None, cancel=None):
+        return self.pool.apply_async(shared_shortest_prime_implicants, (shared.name, shared.size, target, inputs, 0, 0, k, max_size, queue, key, cancel))
+
+    # waits for the results, meanwhile calls progress(key, stats) with the reports from the queue 
+    # and sets the token of the workers once the cancel token of the caller (any object with is_set()) is set 
+    # or waiting fails (e.g. on KeyboardInterrupt or an error of the callback)
+    def wait(self, results, queue=None, progress=None, token=None, cancel=None):
+        pending = list(results)
+        try:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    token.set()
+                if len(pending) > 0:
+                    pending[0].wait(0.1)
+                    pending = [ res for res in pending if not res.ready() ]
+                while queue is not None and not queue.empty():
+                    progress(*queue.get())
+                if len(pending) == 0:
+                    return [ res.get() for res in results ]
+        except BaseException:
+            if token is not None:
+                token.set()
+            raise